@@ -0,0 +1,249 @@
+import concurrent.futures
+import concurrent.futures.process
+import io
+import os
+import signal
+import threading
+import zipfile
+from collections import namedtuple
+
+try:
+    import resource
+except ImportError:  # not available on Windows; extraction runs without a memory limit there
+    resource = None
+
+from pdfminer.pdfdocument import PDFEncryptionError, PDFPasswordIncorrect
+
+import extractors
+from config import Config
+from metrics import metrics
+from pdf_extractor import count_pages
+from utils import Utils
+
+Admission = namedtuple('Admission', ['extractor', 'size', 'page_count'])
+
+# Formats whose content must carry their magic bytes; text and HTML fragments have none to check
+STRICT_FORMATS = {'pdf', 'docx', 'rtf'}
+# Compound File Binary: a legacy .doc, or an Office file protected with a password
+OLE_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+
+class AdmissionError(ValueError):
+    """A document turned away before or during extraction; reason is a short machine-readable label"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+    def __reduce__(self):
+        # Raised in pool workers, so it has to survive the trip back
+        return AdmissionError, (self.reason, str(self))
+
+
+def _reject(reason, message):
+    metrics.incr('admission_rejections_total', reason=reason)
+    return AdmissionError(reason, message)
+
+
+def check_size(size):
+    if size > Config.MAX_FILE_SIZE:
+        raise _reject('too_large', f"File too large. Maximum size: {Config.MAX_FILE_SIZE/1024/1024}MB")
+    if size == 0:
+        raise _reject('empty', "File is empty")
+
+
+def check_path(file_path):
+    """Reject a file on disk by extension and size before reading it"""
+    try:
+        Utils.validate_file(file_path, Config.SUPPORTED_FORMATS, Config.MAX_FILE_SIZE)
+    except ValueError as e:
+        reason = 'too_large' if 'too large' in str(e) else 'unsupported'
+        raise _reject(reason, str(e))
+    check_size(os.path.getsize(file_path))
+
+
+def admit(data, file_extension):
+    """Cheap checks in front of extraction: size, format, and for PDFs the page count and encryption"""
+    with metrics.span('admission'):
+        check_size(len(data))
+        file_extension = (file_extension or '').lower()
+        if file_extension not in Config.SUPPORTED_FORMATS:
+            raise _reject('unsupported', f"Unsupported file format. Supported formats: {Config.SUPPORTED_FORMATS}")
+
+        head = data[:4096]
+        extractor = extractors.get_extractor(file_extension, head)
+        if extractor.name in STRICT_FORMATS and not extractor.magic(head):
+            if head.startswith(OLE_MAGIC):
+                raise _reject('encrypted', "Document is password protected or in the legacy .doc format")
+            raise _reject('corrupt', f"File content is not a valid {extractor.label} document")
+
+        page_count = None
+        if extractor.name == 'pdf':
+            page_count = _check_pdf(data)
+        elif extractor.name == 'docx':
+            _check_docx(data)
+        elif extractor.name in ('text', 'markdown') and b'\x00' in head:
+            # UTF-16 text is full of NULs too, but starts with a byte order mark
+            if not head.startswith((b'\xff\xfe', b'\xfe\xff')):
+                raise _reject('corrupt', "File content is binary, not text")
+    return Admission(extractor, len(data), page_count)
+
+
+def _check_pdf(data):
+    # Reads the trailer, cross-reference table and catalog only; no page is parsed
+    try:
+        page_count = count_pages(data)
+    except (PDFPasswordIncorrect, PDFEncryptionError):
+        raise _reject('encrypted', "PDF is password protected")
+    except Exception as e:
+        raise _reject('corrupt', f"PDF is damaged or incomplete: {str(e)}")
+    if page_count == 0:
+        raise _reject('corrupt', "PDF has no pages")
+    if Config.ADMISSION_MAX_PAGES and page_count > Config.ADMISSION_MAX_PAGES:
+        raise _reject(
+            'too_many_pages', f"PDF has {page_count} pages. Maximum: {Config.ADMISSION_MAX_PAGES}"
+        )
+    return page_count
+
+
+def _check_docx(data):
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            entries = archive.infolist()
+    except zipfile.BadZipFile as e:
+        raise _reject('corrupt', f"DOCX is damaged: {str(e)}")
+    names = {entry.filename for entry in entries}
+    if 'word/document.xml' not in names:
+        raise _reject('corrupt', "DOCX has no document body")
+    if any(entry.flag_bits & 0x1 for entry in entries):
+        raise _reject('encrypted', "DOCX is password protected")
+    # Sizes come from the zip directory, so a zip bomb is caught before anything is inflated
+    if sum(entry.file_size for entry in entries) > Config.ADMISSION_MAX_UNCOMPRESSED_SIZE:
+        raise _reject('too_large', "DOCX expands beyond the allowed size")
+
+
+def _virtual_memory():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def limit_worker():
+    """Process pool initializer: cap the worker's memory at what it uses now plus EXTRACT_MAX_MEMORY_MB"""
+    if resource is None or not Config.EXTRACT_MAX_MEMORY_MB:
+        return
+    try:
+        limit = _virtual_memory() + Config.EXTRACT_MAX_MEMORY_MB * 1024 * 1024
+    except OSError:
+        return  # no /proc to measure the baseline against
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+class _Timeout(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _Timeout()
+
+
+def limited_extract(data, file_extension):
+    """Extract with EXTRACT_TIMEOUT enforced by a timer signal; meant for a pool worker's main thread
+
+    A worker's metrics are never exported, so rejections are raised uncounted; run_pooled counts them.
+    """
+    timed = (
+        Config.EXTRACT_TIMEOUT and hasattr(signal, 'setitimer')
+        and threading.current_thread() is threading.main_thread()
+    )
+    if timed:
+        previous = signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, Config.EXTRACT_TIMEOUT)
+    try:
+        return extractors.extract(data, file_extension)
+    except _Timeout:
+        raise AdmissionError('timeout', f"Extraction took longer than {Config.EXTRACT_TIMEOUT:g}s")
+    except MemoryError:
+        raise AdmissionError('memory', f"Extraction needed more than {Config.EXTRACT_MAX_MEMORY_MB}MB")
+    except Exception as e:
+        # Extractors wrap their errors, so look for the cause underneath
+        if isinstance(e.__context__, _Timeout):
+            raise AdmissionError('timeout', f"Extraction took longer than {Config.EXTRACT_TIMEOUT:g}s")
+        if isinstance(e.__context__, MemoryError):
+            raise AdmissionError('memory', f"Extraction needed more than {Config.EXTRACT_MAX_MEMORY_MB}MB")
+        raise
+    finally:
+        if timed:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+
+def run_pooled(executor, data, file_extension, timeout=None):
+    """Run limited_extract in a pool worker, recording its extract_<name> span and rejections in this process"""
+    extractor = extractors.get_extractor(file_extension, data[:4096])
+    with metrics.span(f'extract_{extractor.name}') as span:
+        try:
+            text = executor.submit(limited_extract, data, file_extension).result(timeout=timeout)
+        except AdmissionError as e:
+            metrics.incr('admission_rejections_total', reason=e.reason)
+            raise
+        span.output_size = len(text)
+    return text
+
+
+def make_pool(workers=None):
+    """Process pool whose workers run extraction under the memory limit"""
+    return concurrent.futures.ProcessPoolExecutor(workers, initializer=limit_worker)
+
+
+class ExtractPool:
+    """Lazily started extraction pool that is replaced after a crashed worker breaks it"""
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = make_pool(self.workers)
+            return self._pool
+
+    def reset(self, pool):
+        """Drop a broken pool so the next get() starts a fresh one"""
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+
+_pool = ExtractPool(Config.EXTRACT_WORKERS)
+
+
+def bounded_extract(data, file_extension, pool=None):
+    """Extract light documents inline and heavy ones in a limited worker process (an ExtractPool's, or ours)"""
+    if extractors.extraction_cost(file_extension, len(data), data[:4096]) == extractors.LIGHT:
+        return extractors.extract(data, file_extension)
+
+    pool = pool or _pool
+    executor = pool.get()
+    try:
+        # A little slack over the worker's own timer, which covers most stalls
+        return run_pooled(
+            executor, data, file_extension, timeout=Config.EXTRACT_TIMEOUT + 5 if Config.EXTRACT_TIMEOUT else None
+        )
+    except concurrent.futures.TimeoutError:
+        raise _reject('timeout', f"Extraction took longer than {Config.EXTRACT_TIMEOUT:g}s")
+    except concurrent.futures.process.BrokenProcessPool:
+        # The worker was killed, e.g. by the OOM killer; start a fresh pool next time
+        pool.reset(executor)
+        raise _reject('crashed', "Extraction worker crashed")
\ No newline at end of file
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import metrics
+
+
+class AnalysisCache:
+    """Persistent SQLite cache for LLM analysis results with TTL and LRU eviction"""
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_cache_accessed ON analysis_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize_text(text):
+        """Collapse whitespace so cosmetic extraction differences share a key"""
+        return re.sub(r'\s+', ' ', text or '').strip()
+
+    @classmethod
+    def make_key(cls, *parts):
+        """Build a content-addressed key from the given parts"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(cls.normalize_text(part).encode('utf-8'))
+            digest.update(b'\x00')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM analysis_cache WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                metrics.incr('cache_requests_total', result='miss')
+                return None
+
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                metrics.incr('cache_requests_total', result='expired')
+                return None
+
+            self._conn.execute(
+                "UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            metrics.incr('cache_requests_total', result='hit')
+
+        return json.loads(value)
+
+    def set(self, key, value):
+        """Store value under key and evict least recently used entries"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        if self.ttl is not None:
+            self._conn.execute(
+                "DELETE FROM analysis_cache WHERE created_at < ?", (now - self.ttl,)
+            )
+
+        if self.max_entries is not None:
+            self._conn.execute("""
+                DELETE FROM analysis_cache WHERE key IN (
+                    SELECT key FROM analysis_cache
+                    ORDER BY accessed_at DESC
+                    LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM analysis_cache")
+            self._conn.commit()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": size,
+        }
\ No newline at end of file
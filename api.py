@@ -0,0 +1,233 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+import admission
+from config import Config
+from document_store import get_store
+from job_queue import JobQueue
+from market_insights import MarketInsightAnalyzer
+from metrics import metrics
+from question_gen import QuestionGenerator
+from resume_parser import ResumeParser
+from skill_analyzer import SkillAnalyzer
+
+
+class TextRequest(BaseModel):
+    text: str
+
+
+class JobMatchRequest(BaseModel):
+    resume_text: str
+    job_description: str
+
+
+class MultiJobMatchRequest(BaseModel):
+    resume_text: str
+    job_descriptions: Dict[str, str]
+    top_k: Optional[int] = Config.JOB_MATCH_TOP_K
+    min_score: Optional[float] = Config.JOB_MATCH_MIN_SCORE
+
+
+class QuestionsRequest(BaseModel):
+    skills: Optional[str] = None
+    experience: Optional[str] = None
+
+
+class Services:
+    """Process-wide analyzers, executors and queue shared by every request"""
+
+    def __init__(self):
+        self.parser = ResumeParser(Config.GEMINI_API_KEY)
+        self.skills = SkillAnalyzer(self.parser.model, market=self.parser.market)
+        self.questions = QuestionGenerator(self.parser.model)
+        self.market = MarketInsightAnalyzer(self.parser.model, service=self.parser.market)
+        self.queue = JobQueue(Config.JOB_QUEUE_PATH)
+        self.documents = get_store()
+        # pdfminer is pure Python, so extraction needs processes to use more than one core
+        self.extract_pool = admission.ExtractPool(Config.API_EXTRACT_WORKERS)
+        # Model calls block a thread each, so size the pool for many concurrent clients
+        self.thread_pool = concurrent.futures.ThreadPoolExecutor(Config.API_THREADS)
+
+    def shutdown(self):
+        self.extract_pool.shutdown()
+        self.thread_pool.shutdown(wait=False)
+
+
+services = None
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    global services
+    services = Services()
+    asyncio.get_running_loop().set_default_executor(services.thread_pool)
+    try:
+        yield
+    finally:
+        services.shutdown()
+
+
+app = FastAPI(title="AI Resume Analyzer API", lifespan=lifespan)
+
+
+# HTTP status for each admission rejection reason; anything else is 422
+ADMISSION_STATUS = {'unsupported': 415, 'too_large': 413, 'too_many_pages': 413}
+
+
+async def read_upload(upload):
+    """Validate an upload and read it once; Starlette has already spooled large bodies to disk"""
+    file_extension = os.path.splitext(upload.filename or '')[1].lower()
+    try:
+        if file_extension not in Config.SUPPORTED_FORMATS:
+            raise admission.AdmissionError(
+                'unsupported', f"Unsupported file format. Supported formats: {Config.SUPPORTED_FORMATS}"
+            )
+        if upload.size is not None:
+            admission.check_size(upload.size)
+
+        data = await upload.read()
+        # Rejects encrypted, damaged and overlong documents before they reach a worker or the queue
+        await run_blocking(admission.admit, data, file_extension)
+    except admission.AdmissionError as e:
+        raise HTTPException(ADMISSION_STATUS.get(e.reason, 422), str(e))
+    return data, file_extension
+
+
+def _pooled_extract(data, file_extension):
+    # Only heavy formats are worth the trip to another process
+    return admission.bounded_extract(data, file_extension, services.extract_pool)
+
+
+async def extract_upload(upload):
+    """Return the stored Document for an upload; only unseen files go to the extraction pool"""
+    data, file_extension = await read_upload(upload)
+    try:
+        return await run_blocking(
+            services.documents.get_or_extract, data, file_extension, upload.filename, _pooled_extract
+        )
+    except admission.AdmissionError as e:
+        raise HTTPException(ADMISSION_STATUS.get(e.reason, 422), str(e))
+    except Exception as e:
+        raise HTTPException(422, str(e))
+
+
+async def run_blocking(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, metrics.bind(fn), *args)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return metrics.render()
+
+
+@app.post("/analyze")
+async def analyze(file: UploadFile = File(...), job_description: Optional[str] = Form(None)):
+    """Full resume analysis, plus a job match when a job description is given"""
+    document = await extract_upload(file)
+    analysis = await services.parser.analyze_text_async(document, job_description)
+    if 'error' in analysis:
+        raise HTTPException(502, analysis['error'])
+    return analysis
+
+
+@app.post("/job-match")
+async def job_match(request: JobMatchRequest):
+    return await run_blocking(services.parser.analyze_job_match, request.resume_text, request.job_description)
+
+
+@app.post("/job-match/file")
+async def job_match_file(file: UploadFile = File(...), job_description: str = Form(...)):
+    document = await extract_upload(file)
+    return await run_blocking(services.parser.analyze_job_match, document, job_description)
+
+
+@app.post("/job-match/many")
+async def job_match_many(request: MultiJobMatchRequest):
+    """Rank one resume against many jobs; jobs pruned locally have no match fields"""
+    table = await run_blocking(
+        services.parser.analyze_job_matches, request.resume_text, request.job_descriptions,
+        request.top_k, request.min_score
+    )
+    # to_json turns the NaN scores of pruned jobs into nulls
+    return {"matches": json.loads(table.reset_index().to_json(orient='records'))}
+
+
+@app.post("/extract")
+async def extract(file: UploadFile = File(...)):
+    document = await extract_upload(file)
+    return {"text": document.text, "document": document.metadata()}
+
+
+@app.post("/skills")
+async def extract_skills(request: TextRequest):
+    return {"skills": await run_blocking(services.skills.extract_skills, request.text)}
+
+
+@app.post("/skills/market-demand")
+async def skill_market_demand(request: TextRequest):
+    return {"market_demand": await run_blocking(services.skills.analyze_skill_market_demand, request.text)}
+
+
+@app.post("/questions")
+async def generate_questions(request: QuestionsRequest):
+    if not request.skills and not request.experience:
+        raise HTTPException(422, "Provide skills, experience or both")
+
+    calls = []
+    if request.skills:
+        calls.append(run_blocking(services.questions.generate_technical_questions, request.skills))
+    if request.experience:
+        calls.append(run_blocking(services.questions.generate_behavioral_questions, request.experience))
+    results = iter(await asyncio.gather(*calls))
+
+    return {
+        "technical": next(results) if request.skills else None,
+        "behavioral": next(results) if request.experience else None,
+    }
+
+
+@app.post("/market-insights")
+async def market_insights(request: TextRequest):
+    return {"insights": await run_blocking(services.market.analyze_market_trends, request.text)}
+
+
+@app.post("/batch", status_code=202)
+async def submit_batch(files: List[UploadFile] = File(...), job_description: Optional[str] = Form(None)):
+    """Queue many resumes for the background workers and return their job ids"""
+    jobs = []
+    for upload in files:
+        try:
+            data, _ = await read_upload(upload)
+        except HTTPException as e:
+            jobs.append({"file": upload.filename, "error": e.detail})
+            continue
+        job_id = await run_blocking(services.queue.submit, upload.filename, data, job_description)
+        jobs.append({"file": upload.filename, "job_id": job_id})
+    return {"jobs": jobs}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await run_blocking(services.queue.get, job_id)
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    return job
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    uvicorn.run(app, host=Config.API_HOST, port=Config.API_PORT)
\ No newline at end of file
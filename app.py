@@ -1,9 +1,16 @@
 import streamlit as st
 import plotly.express as px
 from pathlib import Path
+import contextlib
+import hashlib
 import json
 import os
+import time
 from dotenv import load_dotenv
+from admission import AdmissionError, admit
+from config import Config
+from job_queue import ACTIVE_STATUSES, JobQueue
+from metrics import metrics
 from resume_parser import ResumeParser
 
 # Load environment variables
@@ -132,9 +139,37 @@ def local_css():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_parser(api_key):
+    """One parser (and model client and cache connection) per process, shared across reruns"""
+    if Config.METRICS_PORT:
+        metrics.serve(Config.METRICS_PORT)
+    return ResumeParser(api_key)
+
+@st.cache_resource
+def get_queue():
+    return JobQueue(Config.JOB_QUEUE_PATH)
+
 class StreamlitApp:
+    # Analyses kept per session so reruns can redisplay them without another call
+    MAX_SESSION_RESULTS = 5
+
     def __init__(self):
-        self.parser = ResumeParser(os.getenv('GEMINI_API_KEY'))
+        self.parser = get_parser(os.getenv('GEMINI_API_KEY'))
+        self.results = st.session_state.setdefault('analysis_results', {})
+
+    @staticmethod
+    def result_key(uploaded_file, job_desc):
+        """Identify an analysis by the uploaded file's content and the job description"""
+        digest = hashlib.sha256(uploaded_file.getvalue())
+        digest.update(b'\x00' + (job_desc or '').strip().encode('utf-8'))
+        return digest.hexdigest()
+
+    def store_result(self, key, analysis_result):
+        self.results.pop(key, None)
+        self.results[key] = analysis_result
+        while len(self.results) > self.MAX_SESSION_RESULTS:
+            self.results.pop(next(iter(self.results)))
 
     def render_sidebar(self):
         with st.sidebar:
@@ -161,9 +196,9 @@ class StreamlitApp:
     def render_file_upload(self):
         st.header("📄 Upload Resume")
         uploaded_file = st.file_uploader(
-            "Choose your resume (PDF/DOCX)", 
-            type=["pdf", "docx"],
-            help="Upload your resume in PDF or DOCX format"
+            "Choose your resume (PDF/DOCX/TXT/MD/HTML/RTF)", 
+            type=[extension.lstrip('.') for extension in Config.SUPPORTED_FORMATS],
+            help="Upload your resume as PDF, Word (DOCX), plain text, Markdown, HTML or RTF"
         )
         return uploaded_file
 
@@ -294,6 +329,49 @@ class StreamlitApp:
                     for item in items:
                         st.markdown(f'<div class="suggestion-card">{item}</div>', unsafe_allow_html=True)
 
+    def display_token_usage(self, usage):
+        """Show how much the resume text was compacted before prompting"""
+        st.caption(
+            f"Resume text: {usage.get('resume_tokens_before', 0)} → "
+            f"{usage.get('resume_tokens_after', 0)} estimated tokens"
+            + (" (truncated to fit the prompt budget)" if usage.get('truncated') else "")
+        )
+
+    def render_results_layout(self):
+        """Lay out empty slots for every section so they can be filled in any order"""
+        placeholders = {'summary': st.empty(), 'token_usage': st.empty()}
+
+        # Create tabs for different sections
+        tabs = st.tabs([
+            "🎯 Skills", 
+            "🏆 Achievements", 
+            "💼 Experience", 
+            "📈 Insights",
+            "💡 Suggestions"
+        ])
+        sections = ['skills', 'achievements', 'experience', 'market_insights', 'suggestions']
+
+        for tab, section in zip(tabs, sections):
+            with tab:
+                placeholders[section] = st.empty()
+
+        return placeholders
+
+    def render_section(self, placeholders, section, data):
+        """Render one analysis section into its placeholder"""
+        renderers = {
+            'summary': self.display_summary_section,
+            'skills': self.display_skills_section,
+            'achievements': self.display_achievements_section,
+            'experience': self.display_experience_section,
+            'market_insights': self.display_market_insights,
+            'suggestions': self.display_improvement_suggestions,
+            'token_usage': self.display_token_usage,
+        }
+        if section in renderers and section in placeholders:
+            with placeholders[section].container():
+                renderers[section](data)
+
     def main(self):
         local_css()
         self.render_sidebar()
@@ -314,49 +392,114 @@ class StreamlitApp:
                 for key, value in file_details.items():
                     st.write(f"**{key}:** {value}")
 
+        stream_results = st.checkbox(
+            "Show results as they arrive",
+            value=True,
+            help="Render each section as soon as the AI finishes it"
+        )
+        include_timings = st.checkbox(
+            "Include timing breakdown in report",
+            value=False,
+            help="Add per-stage durations (extraction, prompting, AI calls, decoding) to the downloaded report"
+        )
+
+        if Config.JOB_QUEUE_ENABLED:
+            self.run_queued(uploaded_file, job_desc, include_timings)
+            return
+
+        result_key = self.result_key(uploaded_file, job_desc) if uploaded_file else None
+
         if uploaded_file and st.button("🔍 Analyze Resume", type="primary"):
             try:
-                with st.spinner("🔄 Analyzing your resume... This may take a moment."):
-                    analysis_result = self.parser.analyze_resume(uploaded_file, job_desc)
-                    
-                    # Display summary first
-                    self.display_summary_section(analysis_result.get('summary', {}))
-                    
-                    # Create tabs for different sections
-                    tabs = st.tabs([
-                        "🎯 Skills", 
-                        "🏆 Achievements", 
-                        "💼 Experience", 
-                        "📈 Insights",
-                        "💡 Suggestions"
-                    ])
-                    
-                    with tabs[0]:
-                        self.display_skills_section(analysis_result.get('skills', {}))
-                    
-                    with tabs[1]:
-                        self.display_achievements_section(analysis_result.get('achievements', []))
-                    
-                    with tabs[2]:
-                        self.display_experience_section(analysis_result.get('experience', {}))
-                    
-                    with tabs[3]:
-                        self.display_market_insights(analysis_result.get('market_insights', {}))
-                    
-                    with tabs[4]:
-                        self.display_improvement_suggestions(analysis_result.get('suggestions', {}))
-                    
-                    # Add download button for full report
-                    st.download_button(
-                        label="📥 Download Full Report",
-                        data=json.dumps(analysis_result, indent=2),
-                        file_name="resume_analysis_report.json",
-                        mime="application/json",
-                    )
+                placeholders = self.render_results_layout()
+                analysis_result = {}
+
+                tracing = metrics.trace() if include_timings else contextlib.nullcontext()
+                with st.spinner("🔄 Analyzing your resume... This may take a moment."), tracing as trace:
+                    if stream_results:
+                        sections = self.parser.analyze_resume_stream(uploaded_file, job_desc)
+                    else:
+                        sections = self.parser.analyze_resume(uploaded_file, job_desc).items()
+
+                    for section, data in sections:
+                        if section == 'error':
+                            st.error(f"An error occurred: {data}")
+                            return
+                        analysis_result[section] = data
+                        self.render_section(placeholders, section, data)
+
+                if include_timings:
+                    analysis_result['timings'] = trace.breakdown()
+                if Config.METRICS_FILE:
+                    metrics.write(Config.METRICS_FILE)
+                self.store_result(result_key, analysis_result)
                     
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
                 st.markdown("Please try again with a different file or contact support if the problem persists.")
+                return
+
+        elif result_key in self.results:
+            # A rerun (tab switch, download click, ...) redraws the stored analysis
+            self.render_stored_result(self.results[result_key])
+
+        if result_key in self.results:
+            self.render_download(self.results[result_key])
+
+    def render_stored_result(self, analysis_result):
+        placeholders = self.render_results_layout()
+        for section, data in analysis_result.items():
+            self.render_section(placeholders, section, data)
+
+    def render_download(self, analysis_result):
+        # Add download button for full report
+        st.download_button(
+            label="📥 Download Full Report",
+            data=json.dumps(analysis_result, indent=2),
+            file_name="resume_analysis_report.json",
+            mime="application/json",
+        )
+
+    def run_queued(self, uploaded_file, job_desc, include_timings):
+        """Hand the analysis to a background worker and poll for it; the job id lives in the URL"""
+        queue = get_queue()
+
+        if uploaded_file and st.button("🔍 Analyze Resume", type="primary"):
+            data = uploaded_file.getvalue()
+            try:
+                # Turn bad files away here rather than after they have waited in the queue
+                admit(data, os.path.splitext(uploaded_file.name)[1])
+            except AdmissionError as e:
+                st.error(f"An error occurred: {str(e)}")
+                return
+            st.query_params['job'] = queue.submit(
+                uploaded_file.name,
+                data,
+                job_desc,
+                options={'timings': include_timings}
+            )
+
+        job_id = st.query_params.get('job')
+        if not job_id:
+            return
+
+        key = f"job:{job_id}"
+        if key not in self.results:
+            job = queue.get(job_id)
+            if job is None:
+                st.warning("That analysis could not be found. Please analyze the resume again.")
+                return
+            if job['status'] in ACTIVE_STATUSES:
+                st.info(f"⏳ Analysis {job['status']}... You can leave this page and come back later.")
+                time.sleep(Config.JOB_POLL_INTERVAL)
+                st.rerun()
+            if job['status'] == 'failed':
+                st.error(f"An error occurred: {job['error']}")
+                return
+            self.store_result(key, job['result'])
+
+        self.render_stored_result(self.results[key])
+        self.render_download(self.results[key])
 
 if __name__ == "__main__":
     app = StreamlitApp()
@@ -0,0 +1,260 @@
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import threading
+
+import admission
+import extractors
+from config import Config
+from document_store import get_store
+from job_matcher import JobMatcher
+from metrics import metrics
+from resume_parser import ResumeParser
+
+BATCH_FORMATS = Config.SUPPORTED_FORMATS
+
+
+def _extract_document(file_path, extract=None):
+    """Extract text and a content hash for one document; extract(data, file_extension) may run it elsewhere"""
+    # Oversized files are turned away before they are read into memory
+    admission.check_path(file_path)
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    file_extension = os.path.splitext(file_path)[1].lower()
+    # Documents seen in earlier runs (or by the app) come straight from the store
+    document = get_store().get_or_extract(data, file_extension, os.path.basename(file_path), extract)
+    return document.text, document.content_hash
+
+
+class BatchAnalyzer:
+    def __init__(self, parser, max_workers=4, extract_workers=None, requests_per_minute=None, timings=False):
+        self.parser = parser
+        self.timings = timings
+        self.parser.model.set_limits(requests_per_minute=requests_per_minute, max_in_flight=max_workers)
+        self.max_workers = max_workers
+        self.extract_workers = extract_workers
+        self.matcher = JobMatcher(self.parser.model)
+        self._write_lock = threading.Lock()
+
+    @staticmethod
+    def collect_files(source):
+        """Return resume paths from a directory or a manifest with one path per line"""
+        if os.path.isdir(source):
+            files = []
+            for root, _, names in os.walk(source):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in BATCH_FORMATS:
+                        files.append(os.path.abspath(os.path.join(root, name)))
+            return sorted(files)
+
+        base_dir = os.path.dirname(os.path.abspath(source))
+        files = []
+        with open(source, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    files.append(os.path.abspath(os.path.join(base_dir, line)))
+        return files
+
+    @staticmethod
+    def load_job_descriptions(paths):
+        """Read job description files into a {name: text} mapping"""
+        jobs = {}
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                jobs[os.path.splitext(os.path.basename(path))[0]] = f.read()
+        return jobs
+
+    @staticmethod
+    def load_checkpoint(output_path):
+        """Return the files that already have a finished record in the output"""
+        done = set()
+        if not os.path.exists(output_path):
+            return done
+
+        with open(output_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written last line from an interrupted run
+                    continue
+                if record.get('status') in ('ok', 'filtered'):
+                    done.add(record['file'])
+        return done
+
+    def run(self, files, job_descriptions, output_path, resume=True, top_k=None, min_score=None):
+        """Analyze files, appending one JSON record per resume to output_path as it finishes"""
+        done = self.load_checkpoint(output_path) if resume else set()
+        pending = [f for f in files if f not in done]
+        summary = {
+            "total": len(files), "skipped": len(files) - len(pending),
+            "ok": 0, "filtered": 0, "error": 0
+        }
+        shortlisting = bool(job_descriptions) and (top_k is not None or min_score is not None)
+
+        # Bound the number of extracted texts waiting for an LLM slot
+        slots = threading.BoundedSemaphore(self.max_workers * 2)
+
+        with open(output_path, 'a' if resume else 'w', encoding='utf-8') as out, \
+                admission.make_pool(self.extract_workers) as extract_pool, \
+                concurrent.futures.ThreadPoolExecutor(self.extract_workers or os.cpu_count()) as store_pool, \
+                concurrent.futures.ThreadPoolExecutor(self.max_workers) as llm_pool:
+
+            extracted = self._extract(extract_pool, store_pool, pending, out, summary)
+            if shortlisting:
+                # Pre-scoring ranks the whole pool, so every extraction has to finish first
+                extracted = list(extracted)
+                prescores = self._prescore(extracted, job_descriptions, top_k, min_score)
+
+            llm_futures = []
+            for file_path, digest, resume_text in extracted:
+                jobs = job_descriptions
+                record = {"file": file_path, "sha256": digest}
+
+                if shortlisting:
+                    scores, shortlisted = prescores[file_path]
+                    record['prescores'] = scores
+                    if not shortlisted:
+                        record['status'] = 'filtered'
+                        self._write(out, record, summary)
+                        continue
+                    jobs = {name: job_descriptions[name] for name in shortlisted}
+
+                slots.acquire()
+                llm_futures.append(llm_pool.submit(
+                    self._analyze, out, record, resume_text, jobs, slots, summary
+                ))
+
+            concurrent.futures.wait(llm_futures)
+
+        if Config.METRICS_FILE:
+            metrics.write(Config.METRICS_FILE)
+        return summary
+
+    @staticmethod
+    def _is_heavy(file_path):
+        try:
+            return extractors.file_cost(file_path) == extractors.HEAVY
+        except OSError:
+            return True  # let the worker report it
+
+    def _extract(self, extract_pool, store_pool, files, out, summary):
+        """Yield (file, sha256, text) as extractions finish, recording failures
+
+        Heavy documents go to the process pool; light ones are extracted inline while the pool works.
+        The document store is only used from this process, as its SQLite connection can't cross a fork,
+        so store_pool threads do the lookups and hand just the raw extraction to a worker process.
+        """
+        def pooled(data, file_extension):
+            return admission.run_pooled(extract_pool, data, file_extension)
+
+        heavy = {file_path for file_path in files if self._is_heavy(file_path)}
+        extract_futures = {
+            store_pool.submit(metrics.bind(_extract_document), file_path, pooled): file_path
+            for file_path in files if file_path in heavy
+        }
+
+        for file_path in files:
+            if file_path in heavy:
+                continue
+            try:
+                resume_text, digest = _extract_document(file_path)
+            except Exception as e:
+                self._write(out, {"file": file_path, "status": "error", "error": str(e)}, summary)
+                continue
+            yield file_path, digest, resume_text
+
+        for future in concurrent.futures.as_completed(extract_futures):
+            file_path = extract_futures[future]
+            try:
+                resume_text, digest = future.result()
+            except Exception as e:
+                self._write(out, {"file": file_path, "status": "error", "error": str(e)}, summary)
+                continue
+            yield file_path, digest, resume_text
+
+    def _prescore(self, extracted, job_descriptions, top_k, min_score):
+        """Score every resume locally and work out which jobs each one is shortlisted for"""
+        resumes = {file_path: resume_text for file_path, _, resume_text in extracted}
+        prescores = {file_path: ({}, []) for file_path in resumes}
+
+        for name, job_desc in job_descriptions.items():
+            ranked = self.matcher.shortlist(resumes, job_desc)
+            shortlisted = self.matcher.scorer.select(ranked, top_k, min_score).index
+            for file_path, score in ranked['score'].items():
+                prescores[file_path][0][name] = float(score)
+            for file_path in shortlisted:
+                prescores[file_path][1].append(name)
+
+        return prescores
+
+    def _analyze(self, out, record, resume_text, job_descriptions, slots, summary):
+        tracing = metrics.trace() if self.timings else contextlib.nullcontext()
+        try:
+            with tracing as trace:
+                analysis = self.parser.analyze_text(resume_text)
+                record['analysis'] = analysis
+                if 'error' in analysis:
+                    record.update(status="error", error=analysis['error'])
+                else:
+                    record['status'] = 'ok'
+                    # All of this resume's jobs go out in as few batched prompts as fit
+                    record['job_matches'] = self.parser.match_jobs(resume_text, job_descriptions)
+            if trace is not None:
+                record['timings'] = trace.breakdown()
+        except Exception as e:
+            record.update(status="error", error=str(e))
+        finally:
+            slots.release()
+
+        self._write(out, record, summary)
+
+    def _write(self, out, record, summary):
+        with self._write_lock:
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+            summary[record['status']] += 1
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Analyze a batch of resumes without the Streamlit UI")
+    arg_parser.add_argument('source', help="Directory of resumes or a manifest file with one path per line")
+    arg_parser.add_argument('--job', action='append', default=[], help="Job description text file (repeatable)")
+    arg_parser.add_argument('--output', default='results.jsonl', help="JSONL file to append results to")
+    arg_parser.add_argument('--workers', type=int, default=4, help="Concurrent LLM requests")
+    arg_parser.add_argument('--extract-workers', type=int, default=None, help="Processes used for text extraction")
+    arg_parser.add_argument('--rpm', type=int, default=Config.LLM_REQUESTS_PER_MINUTE,
+                            help="Maximum LLM requests per minute")
+    arg_parser.add_argument('--top-k', type=int, default=None,
+                            help="Only send the K best locally pre-scored resumes per job to the LLM")
+    arg_parser.add_argument('--min-score', type=float, default=None,
+                            help="Only send resumes with a local pre-score (0-100) at or above this to the LLM")
+    arg_parser.add_argument('--timings', action='store_true', help="Add a per-stage timing breakdown to each record")
+    arg_parser.add_argument('--no-resume', action='store_true', help="Ignore existing results and start over")
+    args = arg_parser.parse_args(argv)
+
+    analyzer = BatchAnalyzer(
+        ResumeParser(Config.GEMINI_API_KEY),
+        max_workers=args.workers,
+        extract_workers=args.extract_workers,
+        requests_per_minute=args.rpm,
+        timings=args.timings
+    )
+    files = analyzer.collect_files(args.source)
+    jobs = analyzer.load_job_descriptions(args.job)
+
+    summary = analyzer.run(
+        files, jobs, args.output,
+        resume=not args.no_resume,
+        top_k=args.top_k,
+        min_score=args.min_score
+    )
+    print(json.dumps(summary))
+    return 0 if summary['error'] == 0 else 1
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
\ No newline at end of file
@@ -0,0 +1,448 @@
+import argparse
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+from docx import Document
+
+from analysis_cache import AnalysisCache
+from document_store import DocumentStore
+from llm_client import LLMClient
+from market_service import MarketService
+from resume_parser import ResumeParser
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+FIRST_NAMES = ['Alex', 'Priya', 'Sam', 'Maria', 'Chen', 'Fatima', 'John', 'Aisha', 'Lucas', 'Yuki']
+LAST_NAMES = ['Smith', 'Khan', 'Garcia', 'Wang', 'Okafor', 'Novak', 'Ahmed', 'Silva', 'Rossi', 'Kim']
+TITLES = ['Software Engineer', 'Data Scientist', 'Product Manager', 'DevOps Engineer',
+          'Frontend Developer', 'Machine Learning Engineer', 'Business Analyst', 'QA Engineer']
+COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises']
+SKILLS = ['Python', 'Java', 'SQL', 'AWS', 'Docker', 'Kubernetes', 'React', 'TensorFlow', 'Pandas',
+          'Spark', 'Git', 'Linux', 'Terraform', 'JavaScript', 'Go', 'PostgreSQL', 'Tableau', 'Scrum']
+VERBS = ['Built', 'Designed', 'Led', 'Migrated', 'Automated', 'Optimized', 'Launched', 'Maintained']
+OBJECTS = ['a data pipeline', 'the billing service', 'an internal dashboard', 'the CI/CD workflow',
+           'a recommendation model', 'the customer portal', 'a reporting platform', 'the mobile API']
+
+JOB_DESCRIPTION = """Senior Software Engineer
+We are looking for an engineer with strong Python, SQL and AWS experience.
+Responsibilities include designing data pipelines, mentoring engineers and owning services in production.
+Experience with Docker, Kubernetes and Terraform is a plus."""
+
+# One open req per title, for matching a resume against many jobs at once
+JOB_DESCRIPTIONS = {
+    title: f"{title}\nWe are hiring a {title.lower()} with experience in {', '.join(SKILLS[i * 2:i * 2 + 4])}.\n"
+           f"You will work closely with product and engineering teams and own your work in production."
+    for i, title in enumerate(TITLES)
+}
+
+LINES_PER_PAGE = 48
+
+
+class InjectedError(Exception):
+    """Transient failure raised by the fake model; looks like an HTTP 503 to the client"""
+    code = 503
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """Deterministic local stand-in for genai.GenerativeModel"""
+
+    def __init__(self, latency=0.05, jitter=0.02, failure_rate=0.0, seed=0, stream_chunks=8):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+        self.stream_chunks = stream_chunks
+        self.calls = 0
+        self.failures = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget attempt history so a rerun sees the same latencies and failures"""
+        with self._lock:
+            self._attempts = {}
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+        # Seed from the prompt and its attempt number, so thread scheduling can't change the outcome
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+        rng = random.Random(f"{self.seed}:{digest}:{attempt}")
+
+        time.sleep(max(0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        if rng.random() < self.failure_rate:
+            with self._lock:
+                self.failures += 1
+            raise InjectedError("Injected failure")
+
+        if 'in_demand_skills' in prompt:
+            text = json.dumps(self._market(rng))
+        elif 'match_percentage' not in prompt:
+            text = json.dumps(self._analysis(rng))
+        elif '[Job 1]' in prompt:
+            jobs = re.findall(r'\[Job (\d+)\]', prompt)
+            text = json.dumps({number: self._job_match(rng) for number in jobs})
+        else:
+            text = json.dumps(self._job_match(rng))
+        if not stream:
+            return FakeResponse(text)
+        size = max(1, len(text) // self.stream_chunks + 1)
+        return iter([FakeResponse(text[i:i + size]) for i in range(0, len(text), size)])
+
+    @staticmethod
+    def _score(rng):
+        return str(rng.randint(40, 95))
+
+    def _analysis(self, rng):
+        skills = rng.sample(SKILLS, 9)
+        return {
+            "summary": {
+                "brief": "Experienced engineer with a record of shipping reliable services.",
+                "years_of_experience": str(rng.randint(1, 15)),
+                "ai_rating": {
+                    "overall": self._score(rng),
+                    "skills_rating": self._score(rng),
+                    "experience_rating": self._score(rng),
+                    "education_rating": self._score(rng)
+                }
+            },
+            "skills": {
+                "expertise_level": {"expert": skills[:3], "intermediate": skills[3:6], "beginner": skills[6:]}
+            },
+            "achievements": [
+                {"title": "Cut costs", "description": "Reduced cloud spend", "impact": "30% lower costs"}
+            ],
+            "experience": {
+                "total_years": f"{rng.randint(1, 15)} years",
+                "experiences": [
+                    {
+                        "title": rng.choice(TITLES),
+                        "company": rng.choice(COMPANIES),
+                        "duration": "2019 - 2023",
+                        "responsibilities": ["Owned services in production"],
+                        "key_achievements": ["Improved latency by 40%"]
+                    }
+                ]
+            },
+            "education": {
+                "education": [
+                    {"degree": "BSc Computer Science", "institution": "State University", "year": "2015",
+                     "achievements": []}
+                ]
+            },
+            "certifications": [{"name": "AWS Solutions Architect", "issuer": "Amazon", "year": "2021"}],
+            "market_insights": {
+                "salary_range": {"average": "$120,000", "range": "$100,000 - $140,000"},
+                "demand": {"trend": "Growing", "growth_rate": "8%"}
+            },
+            "suggestions": {
+                "resume_improvements": ["Quantify achievements"],
+                "skill_improvements": ["Learn Rust"],
+                "career_growth": ["Aim for a staff role"]
+            }
+        }
+
+    def _market(self, rng):
+        average = rng.randint(60, 200) * 1000
+        return {
+            "salary_range": {"average": f"${average:,}", "range": f"${average - 20000:,} - ${average + 20000:,}"},
+            "demand": {"trend": "Growing", "growth_rate": f"{rng.randint(2, 15)}%"},
+            "in_demand_skills": rng.sample(SKILLS, 3),
+            "growth_areas": ["Cloud infrastructure"],
+            "career_paths": ["Staff engineer", "Engineering manager"]
+        }
+
+    def _job_match(self, rng):
+        skills = rng.sample(SKILLS, 6)
+        return {
+            "match_percentage": self._score(rng),
+            "skills_match": self._score(rng),
+            "experience_match": self._score(rng),
+            "missing_skills": skills[:2],
+            "matching_skills": skills[2:],
+            "recommendations": ["Highlight production ownership"]
+        }
+
+
+class UploadedFile:
+    """Minimal stand-in for Streamlit's UploadedFile"""
+
+    def __init__(self, name, data):
+        self.name = name
+        self.size = len(data)
+        self._data = data
+
+    def getbuffer(self):
+        return memoryview(self._data)
+
+    def getvalue(self):
+        return self._data
+
+
+def resume_lines(rng, pages):
+    """Generate the lines of a synthetic resume roughly filling the given number of pages"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(1000, 9999)}",
+        "Summary",
+        f"{rng.choice(TITLES)} with {rng.randint(1, 15)} years of experience in {', '.join(rng.sample(SKILLS, 3))}.",
+        "Skills",
+        ', '.join(rng.sample(SKILLS, 10)),
+        "Education",
+        f"BSc Computer Science, State University, {rng.randint(2000, 2020)}",
+        "Experience",
+    ]
+    while len(lines) < pages * LINES_PER_PAGE:
+        start = rng.randint(2005, 2020)
+        lines.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start} - {start + rng.randint(1, 4)})")
+        for _ in range(rng.randint(3, 6)):
+            lines.append(f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {rng.choice(SKILLS)}")
+    return lines[:pages * LINES_PER_PAGE]
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(lines):
+    """Write a minimal single-font PDF with one text object per page"""
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+    font = 3 + 2 * len(pages)
+    kids = ' '.join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode('latin-1'),
+    ]
+    for i, page in enumerate(pages):
+        objects.append((
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        ).encode('latin-1'))
+        body = "BT /F1 10 Tf 50 760 Td 15 TL " + ' '.join(f"({_pdf_escape(line)}) Tj T*" for line in page) + " ET"
+        body = body.encode('latin-1', 'replace')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(body) + body + b"\nendstream")
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_docx(lines):
+    doc = Document()
+    for line in lines:
+        doc.add_paragraph(line)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def build_corpus(size, page_counts=(1, 2, 4, 8), seed=0):
+    """Generate size synthetic resumes, alternating PDF and DOCX and cycling through lengths"""
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(size):
+        pages = page_counts[i % len(page_counts)]
+        lines = resume_lines(rng, pages)
+        if (i // len(page_counts)) % 2 == 0:
+            corpus.append(UploadedFile(f"resume_{i:03d}.pdf", make_pdf(lines)))
+        else:
+            corpus.append(UploadedFile(f"resume_{i:03d}.docx", make_docx(lines)))
+    return corpus
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, or None where unsupported"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize(latencies):
+    """Latency percentiles in milliseconds (nearest-rank)"""
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+
+    def percentile(p):
+        return round(ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000, 2)
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2),
+        "min_ms": round(ordered[0] * 1000, 2),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+
+def run_timed(fn, items, concurrency=1):
+    """Call fn on every item with the given concurrency, returning latency and throughput stats"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(item):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            result = fn(item)
+            failed = isinstance(result, dict) and 'error' in result
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(timed, items))
+    wall = time.perf_counter() - start
+
+    stats = summarize(latencies)
+    stats.update(
+        concurrency=concurrency,
+        errors=errors,
+        wall_s=round(wall, 3),
+        throughput_per_s=round(len(items) / wall, 2) if wall else None,
+        peak_rss_mb=peak_rss_mb()
+    )
+    return stats
+
+
+class Benchmark:
+    """Runs the extraction, prompting and end-to-end benchmarks against a fake model"""
+
+    def __init__(self, corpus_size=24, concurrency=(1, 4, 16), latency=0.05, jitter=0.02,
+                 failure_rate=0.0, seed=0, mode='full'):
+        self.corpus_size = corpus_size
+        self.concurrency = list(concurrency)
+        self.seed = seed
+        self.mode = mode
+        self.model = FakeGenerativeModel(latency, jitter, failure_rate, seed)
+        self.config = {
+            "corpus_size": corpus_size, "concurrency": self.concurrency, "latency_s": latency,
+            "jitter_s": jitter, "failure_rate": failure_rate, "seed": seed, "mode": mode,
+        }
+
+    def run(self):
+        corpus = build_corpus(self.corpus_size, seed=self.seed)
+        pdfs = [f for f in corpus if f.name.endswith('.pdf')]
+        docx_files = [f for f in corpus if f.name.endswith('.docx')]
+        results = {"peak_rss_mb_after_corpus": peak_rss_mb()}
+
+        results['parse_pdf'] = run_timed(lambda f: ResumeParser.parse_pdf(io.BytesIO(f.getvalue())), pdfs)
+        results['parse_docx'] = run_timed(lambda f: ResumeParser.parse_docx(io.BytesIO(f.getvalue())), docx_files)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = AnalysisCache(os.path.join(cache_dir, 'benchmark.db'), max_entries=len(corpus) * 4)
+            client = LLMClient(
+                self.model, requests_per_minute=10 ** 7, tokens_per_minute=10 ** 10,
+                max_in_flight=max(self.concurrency) * 2
+            )
+            documents = DocumentStore(os.path.join(cache_dir, 'documents.db'), max_entries=len(corpus))
+            market = MarketService(client, path=os.path.join(cache_dir, 'market.db'))
+            parser = ResumeParser(
+                None, cache=cache, mode=self.mode, model=client, documents=documents, market=market
+            )
+
+            # First pass extracts and stores every document; the second is served from the store
+            results['parse_file'] = run_timed(parser.parse_file, corpus)
+            results['parse_file_stored'] = run_timed(parser.parse_file, corpus)
+            texts = [parser.parse_file(f) for f in corpus]
+
+            for name, fn, items in [
+                ('analyze_resume', lambda f: parser.analyze_resume(f), corpus),
+                ('analyze_job_match', lambda text: parser.analyze_job_match(text, JOB_DESCRIPTION), texts),
+                ('analyze_job_matches', lambda text: parser.analyze_job_matches(text, JOB_DESCRIPTIONS), texts),
+            ]:
+                results[name] = {}
+                for concurrency in self.concurrency:
+                    # Start cold at every level so each one measures real (fake) model calls
+                    cache.clear()
+                    market.clear()
+                    self.model.reset()
+                    results[name][f"c{concurrency}"] = run_timed(fn, items, concurrency)
+
+        results['model'] = {"calls": self.model.calls, "injected_failures": self.model.failures,
+                            "client_retries": client.retries}
+        return {
+            "config": self.config,
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            "results": results,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Benchmark extraction and analysis against a local fake model")
+    arg_parser.add_argument('--docs', type=int, default=24, help="Number of synthetic resumes to generate")
+    arg_parser.add_argument('--concurrency', default='1,4,16', help="Comma-separated concurrency levels")
+    arg_parser.add_argument('--latency', type=float, default=0.05, help="Fake model latency in seconds")
+    arg_parser.add_argument('--jitter', type=float, default=0.02, help="Random +/- latency in seconds")
+    arg_parser.add_argument('--failure-rate', type=float, default=0.0, help="Fraction of model calls that fail")
+    arg_parser.add_argument('--seed', type=int, default=0, help="Seed for the corpus and the fake model")
+    arg_parser.add_argument('--mode', choices=['full', 'sectioned'], default='full', help="Analysis mode")
+    arg_parser.add_argument('--output', default=None, help="Write the JSON report here instead of stdout")
+    args = arg_parser.parse_args(argv)
+
+    report = Benchmark(
+        corpus_size=args.docs,
+        concurrency=[int(level) for level in args.concurrency.split(',') if level.strip()],
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+        mode=args.mode
+    ).run()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
\ No newline at end of file
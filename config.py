@@ -6,8 +6,18 @@ load_dotenv()
 
 class Config:
     GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-    SUPPORTED_FORMATS = ['.pdf', '.docx', '.txt']
+    SUPPORTED_FORMATS = ['.pdf', '.docx', '.txt', '.md', '.html', '.htm', '.rtf']
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+    # Files of light formats (text, DOCX, HTML, RTF) up to this size are extracted inline, not in a process pool
+    EXTRACT_INLINE_MAX_BYTES = int(os.getenv('EXTRACT_INLINE_MAX_BYTES', 2 * 1024 * 1024))
+
+    # Admission control, checked before any extraction work
+    ADMISSION_MAX_PAGES = int(os.getenv('ADMISSION_MAX_PAGES', 50)) or None  # PDFs with more pages are rejected
+    ADMISSION_MAX_UNCOMPRESSED_SIZE = int(os.getenv('ADMISSION_MAX_UNCOMPRESSED_SIZE', 50 * 1024 * 1024))  # DOCX
+    # Limits for each document extracted in a worker process
+    EXTRACT_TIMEOUT = float(os.getenv('EXTRACT_TIMEOUT', 30)) or None  # seconds
+    EXTRACT_MAX_MEMORY_MB = int(os.getenv('EXTRACT_MAX_MEMORY_MB', 512)) or None  # on top of the worker's baseline
+    EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', 2))  # pool for heavy documents outside batch runs and the API
     
     # API Templates
     RESUME_ANALYSIS_PROMPT = """
@@ -24,4 +34,80 @@ class Config:
     2. Missing required skills
     3. Relevant experience
     4. Suggestions for improvement
-    """
\ No newline at end of file
+    """
+
+    # Analysis cache
+    CACHE_PATH = os.getenv('ANALYSIS_CACHE_PATH', os.path.join('.cache', 'analysis_cache.db'))
+    CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 7 * 24 * 3600))  # seconds
+    CACHE_MAX_ENTRIES = int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 1000))
+
+    # PDF extraction
+    PDF_LAYOUT_PRESET = os.getenv('PDF_LAYOUT_PRESET', 'accurate')  # 'fast' or 'accurate'
+    PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 20)) or None
+    PDF_MAX_CHARS = int(os.getenv('PDF_MAX_CHARS', 60000)) or None
+    PDF_WORKERS = int(os.getenv('PDF_WORKERS', 1))
+
+    # Extracted text store, keyed by file content hash
+    DOCUMENT_STORE_PATH = os.getenv('DOCUMENT_STORE_PATH', os.path.join('.cache', 'documents.db'))
+    DOCUMENT_STORE_MAX_ENTRIES = int(os.getenv('DOCUMENT_STORE_MAX_ENTRIES', 5000))
+
+    # Analysis mode: 'full' (one prompt) or 'sectioned' (one concurrent prompt per section)
+    ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'full')
+    SECTION_RETRIES = int(os.getenv('SECTION_RETRIES', 2))
+    REASK_INVALID_FIELDS = os.getenv('REASK_INVALID_FIELDS', 'true').lower() == 'true'
+
+    # Prompt budgets, in estimated tokens, for text sent to the model after compaction
+    RESUME_TOKEN_BUDGET = int(os.getenv('RESUME_TOKEN_BUDGET', 6000)) or None
+    JOB_DESCRIPTION_TOKEN_BUDGET = int(os.getenv('JOB_DESCRIPTION_TOKEN_BUDGET', 2000)) or None
+
+    # One-to-many job matching: local pruning, then as few batched prompts as fit the budget
+    JOB_MATCH_TOP_K = int(os.getenv('JOB_MATCH_TOP_K', 10)) or None
+    JOB_MATCH_MIN_SCORE = float(os.getenv('JOB_MATCH_MIN_SCORE', 0)) or None  # local score 0-100
+    JOB_MATCH_BATCH_SIZE = int(os.getenv('JOB_MATCH_BATCH_SIZE', 8))  # jobs per prompt
+    JOB_MATCH_BATCH_TOKEN_BUDGET = int(os.getenv('JOB_MATCH_BATCH_TOKEN_BUDGET', 16000))
+
+    # Skill taxonomy used for local skill extraction and skill overlap scoring
+    SKILL_TAXONOMY_PATH = os.getenv(
+        'SKILL_TAXONOMY_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'skill_taxonomy.json')
+    )
+
+    # Market insights, memoized per canonical profile (role, seniority, top skills) and per skill
+    MARKET_DB_PATH = os.getenv('MARKET_DB_PATH', os.path.join('.cache', 'market.db'))
+    MARKET_REFRESH_SECONDS = int(os.getenv('MARKET_REFRESH_SECONDS', 7 * 24 * 3600))  # then served stale while refreshing
+    MARKET_MAX_AGE_SECONDS = int(os.getenv('MARKET_MAX_AGE_SECONDS', 30 * 24 * 3600))  # then recomputed before use
+    MARKET_PROFILE_TOP_SKILLS = int(os.getenv('MARKET_PROFILE_TOP_SKILLS', 3))
+    MARKET_SKILL_BATCH_SIZE = int(os.getenv('MARKET_SKILL_BATCH_SIZE', 20))
+
+    # Interview question bank, indexed by skill (or role) and difficulty
+    QUESTION_BANK_PATH = os.getenv('QUESTION_BANK_PATH', os.path.join('.cache', 'questions.db'))
+    QUESTIONS_PER_LEVEL = int(os.getenv('QUESTIONS_PER_LEVEL', 2))  # technical questions per skill and difficulty
+    BEHAVIORAL_QUESTIONS = int(os.getenv('BEHAVIORAL_QUESTIONS', 5))
+    QUESTION_BATCH_SIZE = int(os.getenv('QUESTION_BATCH_SIZE', 10))  # skills per generation prompt
+    QUESTION_DUPLICATE_BITS = int(os.getenv('QUESTION_DUPLICATE_BITS', 3))  # simhash distance for near-duplicates
+
+    # Shared LLM client limits
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv('LLM_REQUESTS_PER_MINUTE', 60))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv('LLM_TOKENS_PER_MINUTE', 120000))
+    LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', 8))
+    LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 120))  # seconds, per call including retries
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 4))
+
+    # Stage timing metrics, exported in Prometheus text format
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_FILE = os.getenv('METRICS_FILE', '')  # e.g. a node exporter textfile collector path
+    METRICS_PORT = int(os.getenv('METRICS_PORT', 0))  # serve /metrics on this port when set
+
+    # Background job queue; run workers with `python -m job_queue worker`
+    JOB_QUEUE_ENABLED = os.getenv('JOB_QUEUE_ENABLED', 'false').lower() == 'true'
+    JOB_QUEUE_PATH = os.getenv('JOB_QUEUE_PATH', os.path.join('.cache', 'jobs.db'))
+    JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 300))
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+    JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', 30))  # seconds before a first retry, doubling after
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))  # seconds
+    WORKER_CONCURRENCY = int(os.getenv('WORKER_CONCURRENCY', 2))
+
+    # HTTP API (`python -m api` or `uvicorn api:app`)
+    API_HOST = os.getenv('API_HOST', '0.0.0.0')
+    API_PORT = int(os.getenv('API_PORT', 8000))
+    API_THREADS = int(os.getenv('API_THREADS', 64))  # threads for blocking model calls
+    API_EXTRACT_WORKERS = int(os.getenv('API_EXTRACT_WORKERS', 0)) or None  # processes; default CPU count
\ No newline at end of file
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import zlib
+
+from admission import admit, bounded_extract
+from config import Config
+from metrics import metrics
+from single_flight import SingleFlight
+
+# Bump whenever extraction or normalization output changes, so stored text is re-extracted
+EXTRACTOR_VERSION = 2
+
+
+def extractor_version():
+    """Version tag for stored text, covering the code and the settings that shape its output"""
+    return f"{EXTRACTOR_VERSION}:{Config.PDF_LAYOUT_PRESET}:{Config.PDF_MAX_PAGES}:{Config.PDF_MAX_CHARS}"
+
+
+def normalize_text(text):
+    """Normalize extracted text: Unicode forms, trailing spaces and runs of blank lines"""
+    text = unicodedata.normalize('NFKC', text or '')
+    text = re.sub(r'[ \t]+(?=\n|\f|$)', '', text)
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+class Document:
+    """Metadata for a stored document; the text is decompressed on first access"""
+
+    def __init__(self, store, content_hash, file_name, page_count, char_count,
+                 extraction_seconds, extractor_version, text=None):
+        self.store = store
+        self.content_hash = content_hash
+        self.file_name = file_name
+        self.page_count = page_count
+        self.char_count = char_count
+        self.extraction_seconds = extraction_seconds
+        self.extractor_version = extractor_version
+        self._text = text
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.store.load_text(self.content_hash)
+        return self._text
+
+    def __deepcopy__(self, memo):
+        # Shared between coalesced callers as-is; it is read-only and holds the store connection
+        return self
+
+    def metadata(self):
+        return {
+            "content_hash": self.content_hash,
+            "file_name": self.file_name,
+            "page_count": self.page_count,
+            "char_count": self.char_count,
+            "extraction_seconds": self.extraction_seconds,
+            "extractor_version": self.extractor_version,
+        }
+
+
+def resolve_text(value):
+    """Accept either raw text or a stored Document wherever resume text is expected"""
+    return value.text if isinstance(value, Document) else value
+
+
+class DocumentStore:
+    """Compressed SQLite store of extracted document text keyed by file content hash"""
+
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or Config.DOCUMENT_STORE_PATH
+        self.max_entries = max_entries or Config.DOCUMENT_STORE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS documents (
+                content_hash TEXT PRIMARY KEY,
+                extractor_version TEXT NOT NULL,
+                file_name TEXT,
+                page_count INTEGER,
+                char_count INTEGER NOT NULL,
+                extraction_seconds REAL NOT NULL,
+                text BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_accessed ON documents (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def content_hash(data):
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, content_hash):
+        """Return the stored Document, or None if it is missing or from an older extractor"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_name, page_count, char_count, extraction_seconds, extractor_version "
+                "FROM documents WHERE content_hash = ?",
+                (content_hash,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            if row[4] != extractor_version():
+                self._conn.execute("DELETE FROM documents WHERE content_hash = ?", (content_hash,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE documents SET accessed_at = ? WHERE content_hash = ?", (time.time(), content_hash)
+            )
+            self._conn.commit()
+        return Document(self, content_hash, *row)
+
+    def load_text(self, content_hash):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text FROM documents WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(content_hash)
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def get_or_extract(self, data, file_extension, file_name=None, extract=None):
+        """Return the Document for these bytes, extracting them only if no current copy is stored
+
+        Unseen documents pass admission control first. extract(data, file_extension) may be given to run
+        the extraction elsewhere, e.g. a process pool; by default heavy documents go to a limited worker process.
+        """
+        content_hash = self.content_hash(data)
+        document = self.get(content_hash)
+        if document is not None:
+            metrics.incr('document_store_requests_total', result='hit')
+            return document
+
+        metrics.incr('document_store_requests_total', result='miss')
+        # Concurrent uploads of the same file share one extraction
+        return self._inflight.do(
+            content_hash, self._extract, content_hash, data, file_extension, file_name, extract or bounded_extract
+        )
+
+    def _extract(self, content_hash, data, file_extension, file_name, extract):
+        # Reject oversized, mislabeled, encrypted or damaged files before spending anything on them
+        admission = admit(data, file_extension)
+        started = time.perf_counter()
+        text = normalize_text(extract(data, file_extension))
+        elapsed = time.perf_counter() - started
+        # Read from the PDF catalog during admission; the other formats have no fixed pagination
+        page_count = admission.page_count
+
+        document = Document(
+            self, content_hash, file_name, page_count, len(text), round(elapsed, 4), extractor_version(), text
+        )
+        self.put(document)
+        return document
+
+    def put(self, document):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (content_hash, extractor_version, file_name, page_count, "
+                "char_count, extraction_seconds, text, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    document.content_hash, document.extractor_version, document.file_name, document.page_count,
+                    document.char_count, document.extraction_seconds,
+                    zlib.compress(document.text.encode('utf-8')), now, now
+                )
+            )
+            if self.max_entries is not None:
+                self._conn.execute("""
+                    DELETE FROM documents WHERE content_hash IN (
+                        SELECT content_hash FROM documents
+                        ORDER BY accessed_at DESC
+                        LIMIT -1 OFFSET ?
+                    )
+                """, (self.max_entries,))
+            self._conn.commit()
+
+    def delete(self, content_hash):
+        with self._lock:
+            self._conn.execute("DELETE FROM documents WHERE content_hash = ?", (content_hash,))
+            self._conn.commit()
+
+    def invalidate(self):
+        """Drop every document extracted by another extractor version"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM documents WHERE extractor_version != ?", (extractor_version(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=None):
+    """Return the process-wide store for a path, opening it on first use"""
+    path = path or Config.DOCUMENT_STORE_PATH
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = DocumentStore(path)
+        return _stores[path]
\ No newline at end of file
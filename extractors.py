@@ -0,0 +1,372 @@
+import codecs
+import io
+import os
+import re
+import zipfile
+from collections import namedtuple
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+from config import Config
+from metrics import metrics
+from pdf_extractor import extract_pdf_text
+
+# Light extractors are cheap enough to run inline; heavy ones belong in a process pool
+LIGHT = 'light'
+HEAVY = 'heavy'
+
+Extractor = namedtuple('Extractor', ['name', 'label', 'extensions', 'magic', 'cost', 'extract'])
+
+_registry = []
+_by_extension = {}
+
+
+def register(name, label, extensions, magic=None, cost=LIGHT):
+    """Register fn(source) -> text for some extensions; magic(head) -> bool recognizes the format by content"""
+    def decorator(fn):
+        extractor = Extractor(name, label, tuple(extensions), magic, cost, fn)
+        _registry.append(extractor)
+        for extension in extensions:
+            _by_extension[extension] = extractor
+        return fn
+    return decorator
+
+
+def sniff(head):
+    """Extractor whose magic bytes match the start of a file, if any"""
+    for extractor in _registry:
+        if extractor.magic is not None and extractor.magic(head):
+            return extractor
+    return None
+
+
+def get_extractor(file_extension, head=None):
+    """Extractor for a file; the content's magic bytes win over a wrong or missing extension"""
+    by_extension = _by_extension.get((file_extension or '').lower())
+    if head:
+        if by_extension is not None and by_extension.magic is not None and by_extension.magic(head):
+            return by_extension
+        sniffed = sniff(head)
+        if sniffed is not None:
+            return sniffed
+    if by_extension is None:
+        raise ValueError("Unsupported file format")
+    return by_extension
+
+
+def supported_extensions():
+    return list(_by_extension)
+
+
+def extraction_cost(file_extension, size, head=None):
+    """LIGHT or HEAVY; light formats count as heavy past EXTRACT_INLINE_MAX_BYTES"""
+    try:
+        extractor = get_extractor(file_extension, head)
+    except ValueError:
+        return LIGHT  # fails straight away
+    if extractor.cost == HEAVY or size > Config.EXTRACT_INLINE_MAX_BYTES:
+        return HEAVY
+    return LIGHT
+
+
+def file_cost(file_path):
+    with open(file_path, 'rb') as f:
+        head = f.read(4096)
+    return extraction_cost(os.path.splitext(file_path)[1], os.path.getsize(file_path), head)
+
+
+def extract(data, file_extension):
+    """Extract text from the bytes of a document"""
+    extractor = get_extractor(file_extension, data[:4096])
+    return run(extractor, io.BytesIO(data))
+
+
+def run(extractor, source):
+    try:
+        with metrics.span(f'extract_{extractor.name}') as span:
+            text = extractor.extract(source)
+            span.output_size = len(text)
+        return text
+    except Exception as e:
+        raise Exception(f"Error parsing {extractor.label}: {str(e)}")
+
+
+def _read(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    return source.read()
+
+
+def decode_text(data):
+    """Decode text bytes: a BOM if there is one, then UTF-8, then Windows-1252"""
+    for bom, encoding in ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'),
+                          (codecs.BOM_UTF16_BE, 'utf-16')):
+        if data.startswith(bom):
+            return data.decode(encoding)
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('cp1252', errors='replace')
+
+
+@register('pdf', 'PDF', ['.pdf'], magic=lambda head: head.startswith(b'%PDF-'), cost=HEAVY)
+def extract_pdf(source):
+    return extract_pdf_text(
+        source,
+        preset=Config.PDF_LAYOUT_PRESET,
+        max_pages=Config.PDF_MAX_PAGES,
+        max_chars=Config.PDF_MAX_CHARS,
+        workers=Config.PDF_WORKERS
+    )
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Text boxes are written twice, as DrawingML and as a VML fallback; only the first is read
+FALLBACK = '{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback'
+
+
+def _docx_part(archive, name):
+    """Paragraph lines of one part, streamed; table rows come out as 'cell | cell'"""
+    lines = []
+    containers = [lines]  # where finished paragraphs go: the part, or a table cell or row
+    paragraphs = []       # text of the open paragraphs; a text box nests one inside another
+    skipping = 0
+
+    with archive.open(name) as f:
+        for event, elem in ElementTree.iterparse(f, events=('start', 'end')):
+            tag = elem.tag
+            if tag == FALLBACK:
+                skipping += 1 if event == 'start' else -1
+                continue
+            if skipping:
+                continue
+
+            if event == 'start':
+                if tag == W + 'p':
+                    paragraphs.append([])
+                elif tag in (W + 'tr', W + 'tc'):
+                    containers.append([])
+                continue
+
+            if tag == W + 't' and paragraphs:
+                paragraphs[-1].append(elem.text or '')
+            elif tag == W + 'tab' and paragraphs:
+                paragraphs[-1].append('\t')
+            elif tag in (W + 'br', W + 'cr') and paragraphs:
+                paragraphs[-1].append('\n')
+            elif tag == W + 'p':
+                text = ''.join(paragraphs.pop()).strip()
+                if text:
+                    containers[-1].append(text)
+                elem.clear()
+            elif tag == W + 'tc':
+                cell = ' '.join(containers.pop())
+                containers[-1].append(cell)
+            elif tag == W + 'tr':
+                row = ' | '.join(cell for cell in containers.pop() if cell)
+                if row:
+                    containers[-1].append(row)
+                elem.clear()
+    return lines
+
+
+def _part_order(name):
+    number = re.search(r'(\d+)\.xml$', name)
+    return int(number.group(1)) if number else 0
+
+
+def _is_docx(head):
+    # Any zip; the part names can sit past the first few KB, so admission checks for word/document.xml
+    return head.startswith(b'PK\x03\x04')
+
+
+@register('docx', 'DOCX', ['.docx'], magic=_is_docx)
+def extract_docx(source):
+    """Body, tables, text boxes, headers and footers, in reading order"""
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        headers = sorted((n for n in names if re.match(r'word/header\d*\.xml$', n)), key=_part_order)
+        footers = sorted((n for n in names if re.match(r'word/footer\d*\.xml$', n)), key=_part_order)
+
+        lines = []
+        seen = set()
+        for name in headers + ['word/document.xml'] + footers:
+            if name not in names:
+                continue
+            part = _docx_part(archive, name)
+            # First page, even page and default headers usually say the same thing
+            if name != 'word/document.xml':
+                key = tuple(part)
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines += part
+    return '\n'.join(lines)
+
+
+@register('text', 'text', ['.txt', '.text'])
+def extract_plain_text(source):
+    # Nothing to parse; the text is the document
+    return decode_text(_read(source)).replace('\r\n', '\n')
+
+
+@register('markdown', 'Markdown', ['.md', '.markdown'])
+def extract_markdown(source):
+    # Markdown reads fine as-is, so it takes the plain text path
+    return extract_plain_text(source)
+
+
+class _HTMLText(HTMLParser):
+    BLOCKS = {
+        'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'footer', 'h1', 'h2',
+        'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table',
+        'tr', 'ul',
+    }
+    SKIP = {'script', 'style', 'head', 'noscript', 'template', 'svg'}
+    CELL = '\x00'
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skipping = 0
+        self.pre = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self.skipping += 1
+        elif tag in ('td', 'th'):
+            self.parts.append(self.CELL)
+        elif tag in self.BLOCKS:
+            self.parts.append('\n')
+        if tag == 'pre':
+            self.pre += 1
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ('br', 'hr'):
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in self.BLOCKS:
+            self.parts.append('\n')
+        if tag == 'pre':
+            self.pre = max(self.pre - 1, 0)
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data if self.pre else re.sub(r'\s+', ' ', data))
+
+    def text(self):
+        lines = []
+        for line in ''.join(self.parts).split('\n'):
+            cells = [cell.strip() for cell in line.split(self.CELL)]
+            line = ' | '.join(cell for cell in cells if cell)
+            if line:
+                lines.append(line)
+        return '\n'.join(lines)
+
+
+def _is_html(head):
+    start = head.lstrip(b'\xef\xbb\xbf \t\r\n')[:64].lower()
+    return start.startswith((b'<!doctype html', b'<html'))
+
+
+@register('html', 'HTML', ['.html', '.htm'], magic=_is_html)
+def extract_html(source):
+    parser = _HTMLText()
+    parser.feed(decode_text(_read(source)))
+    parser.close()
+    return parser.text()
+
+
+_RTF_TOKENS = re.compile(
+    r"\\([a-z]{1,32})(-?\d{1,10})?[ ]?|\\'([0-9a-f]{2})|\\([^a-z])|([{}])|[\r\n]+|(.)", re.IGNORECASE | re.DOTALL
+)
+# Groups that hold formatting tables or embedded data rather than text
+_RTF_DESTINATIONS = {
+    'colortbl', 'datastore', 'filetbl', 'fldinst', 'fonttbl', 'generator', 'info', 'latentstyles',
+    'listoverridetable', 'listtable', 'mmathPr', 'object', 'pict', 'revtbl', 'rsidtbl', 'stylesheet',
+    'themedata', 'xmlnstbl',
+}
+_RTF_SPECIAL = {
+    'par': '\n', 'line': '\n', 'row': '\n', 'sect': '\n', 'page': '\n', 'tab': '\t', 'cell': ' | ',
+    'emdash': '\u2014', 'endash': '\u2013', 'bullet': '\u2022', 'lquote': '\u2018', 'rquote': '\u2019',
+    'ldblquote': '\u201c', 'rdblquote': '\u201d', 'emspace': ' ', 'enspace': ' ', 'qmspace': ' ',
+}
+
+
+def _is_rtf(head):
+    return head.startswith(b'{\\rtf')
+
+
+@register('rtf', 'RTF', ['.rtf'], magic=_is_rtf)
+def extract_rtf(source):
+    rtf = _read(source).decode('latin-1')
+    codepage = 'cp1252'
+    out = []
+    pending = bytearray()  # \'hh bytes, decoded together so multi-byte code pages work
+    stack = []
+    ignorable = False
+    uc_skip = 1  # fallback characters that follow each \u escape
+    skip = 0
+
+    for match in _RTF_TOKENS.finditer(rtf):
+        word, arg, hex_byte, symbol, brace, char = match.groups()
+        if hex_byte:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                pending.append(int(hex_byte, 16))
+            continue
+        if pending:
+            out.append(pending.decode(codepage, errors='replace'))
+            pending.clear()
+
+        if brace:
+            skip = 0
+            if brace == '{':
+                stack.append((uc_skip, ignorable))
+            elif stack:
+                uc_skip, ignorable = stack.pop()
+        elif symbol:
+            skip = 0
+            if symbol == '*':
+                ignorable = True
+            elif ignorable:
+                pass
+            elif symbol == '~':
+                out.append('\xa0')
+            elif symbol in '{}\\':
+                out.append(symbol)
+        elif word:
+            skip = 0
+            if word == 'ansicpg' and arg:
+                codepage = f'cp{arg}'
+                try:
+                    codecs.lookup(codepage)
+                except LookupError:
+                    codepage = 'cp1252'
+            elif word in _RTF_DESTINATIONS:
+                ignorable = True
+            elif ignorable:
+                pass
+            elif word in _RTF_SPECIAL:
+                out.append(_RTF_SPECIAL[word])
+            elif word == 'uc' and arg:
+                uc_skip = int(arg)
+            elif word == 'u' and arg:
+                code = int(arg)
+                out.append(chr(code + 0x10000 if code < 0 else code))
+                skip = uc_skip
+        elif char:
+            if skip:
+                skip -= 1
+            elif not ignorable:
+                out.append(char)
+    if pending:
+        out.append(pending.decode(codepage, errors='replace'))
+
+    # Rows end with a cell separator before the line break
+    return re.sub(r'[ \t]*\|[ \t]*(?=\n|$)', '', ''.join(out)).strip()
\ No newline at end of file
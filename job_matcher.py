@@ -1,9 +1,25 @@
+from analysis_cache import AnalysisCache
+from document_store import resolve_text
+from llm_client import get_client
+from local_scorer import LocalScorer
+from metrics import instrument
+from single_flight import SingleFlight
+
 class JobMatcher:
-    def __init__(self, model):
-        self.model = model
+    _inflight = SingleFlight()
+
+    def __init__(self, model=None, scorer=None):
+        self.model = model or get_client()
+        self.scorer = scorer or LocalScorer()
     
+    @instrument('job_matcher.match_job')
     def match_job(self, resume_text, job_description):
         """Match resume with job description"""
+        resume_text = resolve_text(resume_text)
+        key = AnalysisCache.make_key('match_job', resume_text, job_description)
+        return self._inflight.do(key, self._match_job, resume_text, job_description)
+
+    def _match_job(self, resume_text, job_description):
         prompt = f"""
         Resume:
         {resume_text}
@@ -16,6 +32,22 @@ class JobMatcher:
         response = self.model.generate_content(prompt)
         return response.text
     
+    @instrument('job_matcher.shortlist')
+    def shortlist(self, resumes, job_description, top_k=None, threshold=None, skills=None):
+        """Rank resumes locally and keep only those worth an LLM match"""
+        return self.scorer.shortlist(resumes, job_description, top_k, threshold, skills)
+
+    @instrument('job_matcher.rank_jobs')
+    def rank_jobs(self, resume_text, job_descriptions, top_k=None, threshold=None, skills=None):
+        """Rank {name: text} jobs locally for one resume and keep only those worth an LLM match"""
+        ranked = self.scorer.score_jobs(resolve_text(resume_text), job_descriptions, skills)
+        return self.scorer.select(ranked, top_k, threshold)
+
+    def find_candidates(self, index, job_description, top_k=10, required_skills=None, min_years=None):
+        """Retrieve the best candidates for a job from a ResumeIndex before any LLM matching"""
+        return index.search(job_description, top_k, required_skills=required_skills, min_years=min_years)
+
+    @instrument('job_matcher.generate_improvement_suggestions')
     def generate_improvement_suggestions(self, match_analysis):
         """Generate suggestions for improvement"""
         prompt = f"Based on this job match analysis: {match_analysis}\n\nProvide specific suggestions for improvement."
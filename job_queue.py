@@ -0,0 +1,332 @@
+import argparse
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+import admission
+from config import Config
+from metrics import metrics
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+class JobQueue:
+    """Durable SQLite-backed queue of analysis jobs shared by UI and worker processes"""
+
+    def __init__(self, path=None, lease_seconds=None, max_attempts=None, retry_backoff=None):
+        self.path = path or Config.JOB_QUEUE_PATH
+        self.lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        self.retry_backoff = Config.JOB_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    content_key TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    file_name TEXT NOT NULL,
+                    document BLOB,
+                    job_description TEXT,
+                    options TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    worker TEXT,
+                    lease_until REAL,
+                    not_before REAL,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'not_before' not in columns:
+                # Queues created before retries were delayed
+                conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_content ON jobs (content_key)")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # A connection per operation keeps this safe across threads and processes
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def content_key(data, job_description=None, options=None):
+        digest = hashlib.sha256(data)
+        digest.update(b'\x00' + (job_description or '').strip().encode('utf-8'))
+        digest.update(b'\x00' + json.dumps(options or {}, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def submit(self, file_name, data, job_description=None, options=None):
+        """Queue a document for analysis and return its job id without waiting"""
+        options = options or {}
+        key = self.content_key(data, job_description, options)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            # An identical job that is pending or finished can be shared instead of redone
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE content_key = ? AND status != 'failed' "
+                "ORDER BY created_at DESC LIMIT 1",
+                (key,)
+            ).fetchone()
+            if row is not None:
+                conn.execute("COMMIT")
+                return row['id']
+
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, content_key, status, file_name, document, job_description, "
+                "options, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, key, file_name, data, job_description, json.dumps(options), now, now)
+            )
+            conn.execute("COMMIT")
+        return job_id
+
+    def claim(self, worker_id):
+        """Lease the oldest runnable job (queued and not backing off, or running with an expired lease)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND (not_before IS NULL OR not_before <= ?)) "
+                "OR (status = 'running' AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            if row['attempts'] >= self.max_attempts:
+                # Its previous workers died mid-job too often; give up on it
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, document = NULL, updated_at = ? WHERE id = ?",
+                    ("Gave up after repeated worker failures", now, row['id'])
+                )
+                conn.execute("COMMIT")
+                return self.claim(worker_id)
+
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row['id'])
+            )
+            conn.execute("COMMIT")
+
+        job = dict(row)
+        job.update(status='running', worker=worker_id, attempts=row['attempts'] + 1)
+        return job
+
+    def heartbeat(self, job_ids, worker_id):
+        """Extend the leases a live worker holds"""
+        if not job_ids:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                [(now + self.lease_seconds, now, job_id, worker_id) for job_id in job_ids]
+            )
+
+    def complete(self, job_id, worker_id, result):
+        self._finish(job_id, worker_id, 'done', result=json.dumps(result))
+
+    def fail(self, job_id, worker_id, error, retry=False):
+        """Record a failure; retryable ones are queued again, after a growing delay, until attempts run out"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if retry and row is not None and row['attempts'] < self.max_attempts:
+            # Quota and network trouble rarely clears at once, so don't hand the job straight back out
+            delay = self.retry_backoff * 2 ** (row['attempts'] - 1)
+            self._finish(job_id, worker_id, 'queued', error=error, not_before=time.time() + delay)
+        else:
+            self._finish(job_id, worker_id, 'failed', error=error)
+
+    def _finish(self, job_id, worker_id, status, result=None, error=None, not_before=None):
+        now = time.time()
+        with self._connect() as conn:
+            # Only the lease holder may finish a job, so a worker that lost its lease can't clobber it
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, worker = NULL, lease_until = NULL, "
+                "not_before = ?, document = CASE WHEN ? = 'queued' THEN document ELSE NULL END, updated_at = ? "
+                "WHERE id = ? AND worker = ?",
+                (status, result, error, not_before, status, now, job_id, worker_id)
+            )
+
+    def get(self, job_id):
+        """Return a job's status and, once finished, its result or error"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, file_name, result, error, attempts, not_before, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def stats(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        return {row['status']: row['count'] for row in rows}
+
+    def purge(self, older_than):
+        """Delete finished jobs last updated more than older_than seconds ago"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - older_than,)
+            )
+            return cursor.rowcount
+
+
+class Worker:
+    """Runs extraction and analysis for queued jobs with bounded concurrency"""
+
+    def __init__(self, queue, parser, concurrency=None, poll_interval=None):
+        self.queue = queue
+        self.parser = parser
+        self.concurrency = concurrency or Config.WORKER_CONCURRENCY
+        self.poll_interval = poll_interval or Config.JOB_POLL_INTERVAL
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, max_jobs=None):
+        """Process jobs until stopped (or until max_jobs have been handled)"""
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        handled = 0
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        with concurrent.futures.ThreadPoolExecutor(self.concurrency) as pool:
+            while not self._stop.is_set() and (max_jobs is None or handled < max_jobs):
+                slots.acquire()
+                job = self.queue.claim(self.worker_id)
+                if job is None:
+                    slots.release()
+                    if max_jobs is not None and not self._active:
+                        break
+                    self._stop.wait(self.poll_interval)
+                    continue
+
+                handled += 1
+                with self._active_lock:
+                    self._active.add(job['id'])
+                pool.submit(self._process, job, slots)
+
+        self._stop.set()
+        return handled
+
+    def stop(self):
+        self._stop.set()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._active_lock:
+                active = list(self._active)
+            self.queue.heartbeat(active, self.worker_id)
+
+    def _process(self, job, slots):
+        options = json.loads(job['options'] or '{}')
+        tracing = metrics.trace() if options.get('timings') else contextlib.nullcontext()
+        try:
+            with tracing as trace:
+                extension = os.path.splitext(job['file_name'])[1].lower()
+                document = self.parser.documents.get_or_extract(job['document'], extension, job['file_name'])
+                analysis = self.parser.analyze_text(document, job['job_description'])
+            if trace is not None:
+                analysis['timings'] = trace.breakdown()
+
+            if 'error' in analysis:
+                # Analysis errors are usually quota or network trouble, so give it another go
+                self.queue.fail(job['id'], self.worker_id, analysis['error'], retry=True)
+            else:
+                self.queue.complete(job['id'], self.worker_id, analysis)
+        except Exception as e:
+            # Extraction errors won't go away on retry
+            print(f"Error processing job {job['id']}: {str(e)}")
+            self.queue.fail(job['id'], self.worker_id, str(e))
+        finally:
+            with self._active_lock:
+                self._active.discard(job['id'])
+            slots.release()
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Manage the background analysis queue")
+    arg_parser.add_argument('--queue', default=Config.JOB_QUEUE_PATH, help="Path to the queue database")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    worker_parser = commands.add_parser('worker', help="Run a worker that processes queued jobs")
+    worker_parser.add_argument('--concurrency', type=int, default=Config.WORKER_CONCURRENCY,
+                               help="Jobs this worker runs at once")
+    worker_parser.add_argument('--max-jobs', type=int, default=None, help="Exit after this many jobs")
+
+    submit_parser = commands.add_parser('submit', help="Queue a resume and print its job id")
+    submit_parser.add_argument('file', help="Resume in any supported format")
+    submit_parser.add_argument('--job', default=None, help="Job description text file")
+
+    status_parser = commands.add_parser('status', help="Show a job, or queue totals without an id")
+    status_parser.add_argument('job_id', nargs='?')
+
+    purge_parser = commands.add_parser('purge', help="Delete old finished jobs")
+    purge_parser.add_argument('--days', type=float, default=7)
+
+    args = arg_parser.parse_args(argv)
+    queue = JobQueue(args.queue)
+
+    if args.command == 'worker':
+        from resume_parser import ResumeParser
+
+        worker = Worker(queue, ResumeParser(Config.GEMINI_API_KEY), concurrency=args.concurrency)
+        print(f"Worker {worker.worker_id} processing jobs from {queue.path}")
+        try:
+            worker.run(max_jobs=args.max_jobs)
+        except KeyboardInterrupt:
+            worker.stop()
+    elif args.command == 'submit':
+        job_description = None
+        if args.job:
+            with open(args.job, encoding='utf-8') as f:
+                job_description = f.read()
+        try:
+            admission.check_path(args.file)
+            with open(args.file, 'rb') as f:
+                data = f.read()
+            admission.admit(data, os.path.splitext(args.file)[1])
+        except admission.AdmissionError as e:
+            print(f"Error: {str(e)}")
+            return 1
+        print(queue.submit(os.path.basename(args.file), data, job_description))
+    elif args.command == 'status':
+        print(json.dumps(queue.get(args.job_id) if args.job_id else queue.stats(), indent=2))
+    elif args.command == 'purge':
+        print(queue.purge(args.days * 24 * 3600))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
\ No newline at end of file
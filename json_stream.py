@@ -0,0 +1,76 @@
+import json
+
+
+class JSONSectionStream:
+    """Incremental parser that emits each top-level member of a streamed JSON object once it is complete"""
+
+    def __init__(self):
+        self.sections = {}
+        self.done = False
+        self._raw = []
+        self._member = []
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk):
+        """Consume the next piece of text and return the (key, value) pairs it completed"""
+        completed = []
+        self._raw.append(chunk)
+
+        for char in chunk:
+            if self.done:
+                break
+
+            if not self._started:
+                # Skip any preamble or markdown fence before the object opens
+                if char == '{':
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._member.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+
+            if self._depth == 1 and char == ',':
+                completed.extend(self._flush())
+            elif self._depth == 0:
+                completed.extend(self._flush())
+                self.done = True
+            else:
+                self._member.append(char)
+
+        return completed
+
+    def _flush(self):
+        text = ''.join(self._member).strip()
+        self._member = []
+        if not text:
+            return []
+        try:
+            member = json.loads('{' + text + '}')
+        except json.JSONDecodeError:
+            # Leave malformed members to the full-response fallback
+            return []
+        self.sections.update(member)
+        return list(member.items())
+
+    @property
+    def text(self):
+        """Everything received so far"""
+        return ''.join(self._raw)
\ No newline at end of file
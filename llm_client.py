@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+
+import google.generativeai as genai
+
+from config import Config
+from metrics import metrics
+
+try:
+    from google.api_core import exceptions as api_exceptions
+    RETRYABLE_ERRORS = (
+        api_exceptions.TooManyRequests,
+        api_exceptions.ResourceExhausted,
+        api_exceptions.InternalServerError,
+        api_exceptions.BadGateway,
+        api_exceptions.ServiceUnavailable,
+        api_exceptions.DeadlineExceeded,
+    )
+except ImportError:
+    RETRYABLE_ERRORS = ()
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def estimate_tokens(text):
+    """Rough token count for quota accounting (about four characters per token)"""
+    return max(1, len(text or '') // 4)
+
+
+def is_retryable(error):
+    if RETRYABLE_ERRORS and isinstance(error, RETRYABLE_ERRORS):
+        return True
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount=1, deadline=None):
+        """Block until amount tokens are available; False if the deadline passes first"""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return True
+                wait = (amount - self.tokens) / self.rate
+
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class LLMClient:
+    """Shared gateway for model calls with rate limiting, retries, deadlines and a concurrency cap"""
+
+    def __init__(self, model, requests_per_minute=None, tokens_per_minute=None,
+                 max_in_flight=None, timeout=None, max_retries=None):
+        self.model = model
+        self.timeout = timeout or Config.LLM_TIMEOUT
+        self.max_retries = Config.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.retries = 0
+        self.set_limits(
+            requests_per_minute or Config.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute or Config.LLM_TOKENS_PER_MINUTE,
+            max_in_flight or Config.LLM_MAX_IN_FLIGHT
+        )
+
+    def set_limits(self, requests_per_minute=None, tokens_per_minute=None, max_in_flight=None):
+        """Change quotas, e.g. for a batch run with a different API tier"""
+        if requests_per_minute:
+            self.request_bucket = TokenBucket(requests_per_minute)
+        if tokens_per_minute:
+            self.token_bucket = TokenBucket(tokens_per_minute)
+        if max_in_flight:
+            self._in_flight = threading.BoundedSemaphore(max_in_flight)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Drop-in replacement for GenerativeModel.generate_content"""
+        deadline = time.monotonic() + self.timeout
+        tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+
+        for attempt in range(self.max_retries + 1):
+            if not (self.request_bucket.acquire(1, deadline) and self.token_bucket.acquire(tokens, deadline)):
+                raise TimeoutError("LLM call deadline exceeded while waiting for quota")
+
+            # Hold on to this semaphore in case set_limits swaps it mid-call
+            slot = self._in_flight
+            remaining = deadline - time.monotonic()
+            if not slot.acquire(timeout=max(remaining, 0)):
+                raise TimeoutError("LLM call deadline exceeded while waiting for a free slot")
+
+            try:
+                with metrics.span('llm_call') as span:
+                    span.input_size = tokens
+                    response = self.model.generate_content(
+                        prompt,
+                        stream=stream,
+                        request_options={'timeout': max(deadline - time.monotonic(), 1)},
+                        **kwargs
+                    )
+                    if not stream:
+                        span.output_size = len(response.text)
+            except Exception as e:
+                slot.release()
+                backoff = min(2 ** attempt, 30) * (0.5 + random.random())
+                if attempt == self.max_retries or not is_retryable(e) or time.monotonic() + backoff > deadline:
+                    raise
+                self.retries += 1
+                metrics.incr('llm_retries_total')
+                time.sleep(backoff)
+                continue
+
+            if stream:
+                # Keep the slot until the caller has drained or closed the stream
+                return SlotStream(response, slot)
+
+            slot.release()
+            return response
+
+
+class SlotStream:
+    """Streamed response that holds an in-flight slot until it is drained or closed
+
+    Close it, or use it as a context manager, when stopping early; the slot is
+    released right there rather than whenever the stream is garbage collected.
+    """
+
+    def __init__(self, response, slot):
+        self._response = response
+        self._chunks = iter(response)
+        self._slot = slot
+        self._closed = False
+        self._lock = threading.Lock()
+        self._size = 0
+        self._span = metrics.span('llm_stream')
+        self._span.__enter__()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._span.output_size = self._size
+            self._finish()
+            raise
+        except BaseException as e:
+            self._finish(e)
+            raise
+        self._size += len(chunk.text)
+        return chunk
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        """Stop reading and give the slot back; safe to call more than once"""
+        close = getattr(self._response, 'close', None)
+        if close is not None and not self._closed:
+            close()
+        self._finish()
+
+    def _finish(self, error=None):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._span.__exit__(type(error) if error else None, error, None)
+        finally:
+            self._slot.release()
+
+
+def get_client(model_name='gemini-pro', api_key=None):
+    """Return the process-wide client for a model, creating it on first use"""
+    with _clients_lock:
+        if model_name not in _clients:
+            genai.configure(api_key=api_key or Config.GEMINI_API_KEY)
+            _clients[model_name] = LLMClient(genai.GenerativeModel(model_name))
+        return _clients[model_name]
\ No newline at end of file
@@ -0,0 +1,225 @@
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from nltk.tokenize import RegexpTokenizer
+
+from metrics import instrument
+from skill_taxonomy import get_taxonomy
+
+# Used when the nltk stopwords corpus hasn't been downloaded
+FALLBACK_STOPWORDS = {
+    'a', 'about', 'above', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be',
+    'been', 'being', 'both', 'but', 'by', 'can', 'could', 'did', 'do', 'does', 'each', 'etc',
+    'for', 'from', 'had', 'has', 'have', 'he', 'her', 'his', 'how', 'i', 'if', 'in', 'into',
+    'is', 'it', 'its', 'me', 'more', 'most', 'my', 'no', 'not', 'of', 'on', 'or', 'other',
+    'our', 'out', 'over', 'per', 'she', 'should', 'so', 'some', 'such', 'than', 'that', 'the',
+    'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those', 'through', 'to', 'up',
+    'us', 'very', 'was', 'we', 'well', 'were', 'what', 'when', 'where', 'which', 'while', 'who',
+    'will', 'with', 'within', 'would', 'you', 'your',
+}
+
+
+def _load_stopwords():
+    try:
+        from nltk.corpus import stopwords
+        return set(stopwords.words('english'))
+    except LookupError:
+        return FALLBACK_STOPWORDS
+
+
+class LocalScorer:
+    """Deterministic resume/job similarity computed locally, without any LLM call"""
+
+    # Keeps tokens like c++, c#, node.js and ci/cd intact
+    TOKEN_PATTERN = r"[a-z0-9][a-z0-9+#./\-]*"
+
+    DEFAULT_WEIGHTS = {
+        'keyword_score': 0.3,
+        'skill_score': 0.3,
+        'tfidf_score': 0.2,
+        'bm25_score': 0.2,
+    }
+
+    def __init__(self, weights=None, k1=1.5, b=0.75, taxonomy=None):
+        self.weights = weights or self.DEFAULT_WEIGHTS
+        self.k1 = k1
+        self.b = b
+        self.taxonomy = taxonomy or get_taxonomy()
+        self.stopwords = _load_stopwords()
+        self._tokenizer = RegexpTokenizer(self.TOKEN_PATTERN)
+
+    def tokenize(self, text):
+        """Lowercase, tokenize and drop stopwords"""
+        tokens = self._tokenizer.tokenize((text or '').lower())
+        return [
+            token.rstrip('.-/') for token in tokens
+            if token.rstrip('.-/') and token not in self.stopwords and len(token) > 1
+        ]
+
+    def normalize_skill(self, skill):
+        """Lowercase a skill name, mapping known aliases (k8s, golang, ...) to the canonical skill"""
+        skill = re.sub(r'\s+', ' ', str(skill).strip().lower())
+        canonical = self.taxonomy.canonical(skill)
+        return canonical.lower() if canonical else skill
+
+    @instrument('local_scorer.score')
+    def score(self, resumes, job_description, skills=None):
+        """Score {id: text} resumes against a job, returning a DataFrame sorted by 0-100 score"""
+        # skills optionally maps the same ids to each candidate's skill list
+        ids = list(resumes)
+        if not ids:
+            return pd.DataFrame(columns=list(self.weights) + ['score'])
+
+        doc_counts = [Counter(self.tokenize(resumes[doc_id])) for doc_id in ids]
+        query_terms = sorted(set(self.tokenize(job_description)))
+        n_docs = len(ids)
+
+        # Term frequency of each query term in each resume
+        tf = np.array(
+            [[counts.get(term, 0) for term in query_terms] for counts in doc_counts],
+            dtype=np.float32
+        ).reshape(n_docs, len(query_terms))
+        doc_len = np.array([sum(counts.values()) for counts in doc_counts], dtype=np.float32)
+
+        df = (tf > 0).sum(axis=0)
+        idf = np.log((n_docs + 1) / (df + 1)) + 1
+        bm25_idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+        scores = pd.DataFrame(index=ids)
+
+        # Share of the job's vocabulary (weighted by rarity) found in the resume
+        idf_total = idf.sum()
+        scores['keyword_score'] = ((tf > 0) @ idf) / idf_total if idf_total else 0.0
+
+        # Cosine similarity of TF-IDF vectors over the job's vocabulary
+        doc_vecs = np.log1p(tf) * idf
+        query_vec = idf
+        norms = np.linalg.norm(doc_vecs, axis=1) * np.linalg.norm(query_vec)
+        scores['tfidf_score'] = np.divide(
+            doc_vecs @ query_vec, norms, out=np.zeros(n_docs, dtype=np.float64), where=norms > 0
+        )
+
+        # Okapi BM25, scaled so the best resume in the pool scores 1
+        avg_len = doc_len.mean() or 1.0
+        denom = tf + self.k1 * (1 - self.b + self.b * doc_len[:, None] / avg_len)
+        bm25 = ((tf * (self.k1 + 1)) / np.where(denom > 0, denom, 1)) @ bm25_idf
+        scores['bm25_score'] = bm25 / bm25.max() if bm25.max() > 0 else 0.0
+
+        if skills:
+            job_text = ' '.join(self.tokenize(job_description))
+            scores['skill_score'] = [
+                self._skill_overlap(skills.get(doc_id, []), job_text) for doc_id in ids
+            ]
+        else:
+            # Without skill lists, compare the taxonomy skills found in each text
+            job_skills = self.taxonomy.skills(job_description)
+            scores['skill_score'] = [
+                self._taxonomy_overlap(self.taxonomy.skills(resumes[doc_id]), job_skills) for doc_id in ids
+            ]
+
+        scores['score'] = self._combine(scores)
+        return scores.sort_values('score', ascending=False)
+
+    @instrument('local_scorer.score_jobs')
+    def score_jobs(self, resume_text, job_descriptions, skills=None):
+        """Score one resume against {name: text} jobs, returning a DataFrame sorted by 0-100 score"""
+        # skills optionally lists the candidate's skills
+        names = list(job_descriptions)
+        if not names:
+            return pd.DataFrame(columns=list(self.weights) + ['score'])
+
+        resume_counts = Counter(self.tokenize(resume_text))
+        job_counts = [Counter(self.tokenize(job_descriptions[name])) for name in names]
+        vocabulary = sorted(set(resume_counts).union(*job_counts))
+        n_jobs = len(names)
+
+        # Term frequency of each vocabulary term in each job and in the resume
+        tf = np.array(
+            [[counts.get(term, 0) for term in vocabulary] for counts in job_counts],
+            dtype=np.float32
+        ).reshape(n_jobs, len(vocabulary))
+        resume_tf = np.array([resume_counts.get(term, 0) for term in vocabulary], dtype=np.float32)
+        in_resume = resume_tf > 0
+        job_len = tf.sum(axis=1)
+
+        # Terms few of the jobs share are the ones that tell them apart
+        df = (tf > 0).sum(axis=0)
+        idf = np.log((n_jobs + 1) / (df + 1)) + 1
+        bm25_idf = np.log(1 + (n_jobs - df + 0.5) / (df + 0.5))
+
+        scores = pd.DataFrame(index=names)
+
+        # Share of each job's vocabulary (weighted by rarity) found in the resume
+        job_idf = (tf > 0) * idf
+        idf_totals = job_idf.sum(axis=1)
+        scores['keyword_score'] = np.divide(
+            job_idf @ in_resume, idf_totals, out=np.zeros(n_jobs, dtype=np.float64), where=idf_totals > 0
+        )
+
+        # Cosine similarity of TF-IDF vectors over the shared vocabulary
+        job_vecs = np.log1p(tf) * idf
+        resume_vec = np.log1p(resume_tf) * idf
+        norms = np.linalg.norm(job_vecs, axis=1) * np.linalg.norm(resume_vec)
+        scores['tfidf_score'] = np.divide(
+            job_vecs @ resume_vec, norms, out=np.zeros(n_jobs, dtype=np.float64), where=norms > 0
+        )
+
+        # Okapi BM25 with the resume's terms as the query, scaled so the best job scores 1
+        avg_len = job_len.mean() or 1.0
+        denom = tf + self.k1 * (1 - self.b + self.b * job_len[:, None] / avg_len)
+        bm25 = ((tf * (self.k1 + 1)) / np.where(denom > 0, denom, 1)) @ (bm25_idf * in_resume)
+        scores['bm25_score'] = bm25 / bm25.max() if bm25.max() > 0 else 0.0
+
+        if skills:
+            scores['skill_score'] = [
+                self._skill_overlap(skills, ' '.join(self.tokenize(job_descriptions[name]))) for name in names
+            ]
+        else:
+            resume_skills = self.taxonomy.skills(resume_text)
+            scores['skill_score'] = [
+                self._taxonomy_overlap(resume_skills, self.taxonomy.skills(job_descriptions[name]))
+                for name in names
+            ]
+
+        scores['score'] = self._combine(scores)
+        return scores.sort_values('score', ascending=False)
+
+    def _skill_overlap(self, candidate_skills, job_text):
+        normalized = {self.normalize_skill(skill) for skill in candidate_skills if skill}
+        if not normalized:
+            return 0.0
+        padded = f' {job_text} '
+        matched = sum(
+            1 for skill in normalized
+            if f" {' '.join(self.tokenize(skill))} " in padded
+        )
+        return matched / len(normalized)
+
+    @staticmethod
+    def _taxonomy_overlap(candidate_skills, job_skills):
+        """Share of the job's skills the candidate has; NaN when the job names none"""
+        if not job_skills:
+            return math.nan
+        return len(candidate_skills & job_skills) / len(job_skills)
+
+    def _combine(self, scores):
+        columns = [column for column in self.weights if scores[column].notna().any()]
+        weights = pd.Series({column: self.weights[column] for column in columns})
+        combined = scores[columns].fillna(0) @ weights / weights.sum()
+        return (combined * 100).round(2)
+
+    def shortlist(self, resumes, job_description, top_k=None, threshold=None, skills=None):
+        """Return the ranked candidates worth sending to the LLM"""
+        return self.select(self.score(resumes, job_description, skills), top_k, threshold)
+
+    @staticmethod
+    def select(ranked, top_k=None, threshold=None):
+        """Apply top-k and minimum score cut-offs to a ranked score table"""
+        if threshold is not None:
+            ranked = ranked[ranked['score'] >= threshold]
+        if top_k is not None:
+            ranked = ranked.head(top_k)
+        return ranked
\ No newline at end of file
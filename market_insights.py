@@ -1,18 +1,17 @@
+from llm_client import get_client
+from market_service import MarketProfile, MarketService, profile_from_text
+from metrics import instrument
+
 class MarketInsightAnalyzer:
-    def __init__(self, model):
-        self.model = model
+    def __init__(self, model=None, service=None):
+        self.model = model or get_client()
+        self.service = service or MarketService(self.model)
     
+    @instrument('market_insights.analyze_market_trends')
     def analyze_market_trends(self, profile):
-        """Analyze market trends for the profile"""
-        prompt = f"""
-        Analyze market trends for this profile:
-        {profile}
-        
-        Provide:
-        1. Salary ranges
-        2. In-demand skills
-        3. Industry growth areas
-        4. Career progression paths
-        """
-        response = self.model.generate_content(prompt)
-        return response.text
\ No newline at end of file
+        """Analyze market trends for the profile (free text or a MarketProfile)"""
+        # Similar candidates share a canonical profile, so their insights are computed once
+        if not isinstance(profile, MarketProfile):
+            profile = profile_from_text(profile)
+        insights = self.service.profile_insights(profile)
+        return dict(insights, profile=profile._asdict())
\ No newline at end of file
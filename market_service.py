@@ -0,0 +1,366 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, namedtuple
+
+from config import Config
+from llm_client import get_client
+from metrics import metrics
+from response_schema import MarketTrends, SkillDemand, decode_json
+from single_flight import SingleFlight
+from skill_taxonomy import get_taxonomy
+from utils import Utils
+
+MarketProfile = namedtuple('MarketProfile', ['role', 'seniority', 'skills'])
+
+# Title words that say how senior someone is rather than what they do
+SENIORITY_WORDS = {
+    'intern': 'junior', 'trainee': 'junior', 'graduate': 'junior', 'junior': 'junior', 'jr': 'junior',
+    'associate': 'junior', 'mid': 'mid', 'senior': 'senior', 'sr': 'senior', 'lead': 'lead',
+    'staff': 'lead', 'principal': 'lead', 'head': 'lead', 'director': 'lead',
+    'i': None, 'ii': None, 'iii': None, 'iv': None,
+}
+
+# Common spellings of the same role
+ROLE_ALIASES = {
+    'swe': 'software engineer',
+    'sde': 'software engineer',
+    'software developer': 'software engineer',
+    'software development engineer': 'software engineer',
+    'programmer': 'software engineer',
+    'developer': 'software engineer',
+    'backend developer': 'backend engineer',
+    'back end engineer': 'backend engineer',
+    'frontend developer': 'frontend engineer',
+    'front end developer': 'frontend engineer',
+    'front end engineer': 'frontend engineer',
+    'full stack developer': 'full stack engineer',
+    'fullstack developer': 'full stack engineer',
+    'fullstack engineer': 'full stack engineer',
+    'ml engineer': 'machine learning engineer',
+    'ai engineer': 'machine learning engineer',
+    'site reliability engineer': 'devops engineer',
+    'sre': 'devops engineer',
+    'data analyst': 'data analyst',
+    'bi analyst': 'business intelligence analyst',
+    'qa engineer': 'quality assurance engineer',
+    'test engineer': 'quality assurance engineer',
+    'pm': 'product manager',
+}
+
+_YEARS = re.compile(r'(\d+(?:\.\d+)?)\s*\+?\s*(?:years?|yrs?)\b', re.IGNORECASE)
+
+
+def canonical_role(title):
+    """Normalize a job title: lowercase, no seniority words or punctuation, known aliases merged"""
+    words = re.sub(r'[^a-z0-9+#]+', ' ', (title or '').lower()).split()
+    words = [word for word in words if word not in SENIORITY_WORDS]
+    role = ' '.join(words)
+    return ROLE_ALIASES.get(role, role) or 'professional'
+
+
+def title_seniority(title):
+    """Seniority implied by a job title, if any"""
+    for word in re.sub(r'[^a-z0-9]+', ' ', (title or '').lower()).split():
+        if SENIORITY_WORDS.get(word):
+            return SENIORITY_WORDS[word]
+    return None
+
+
+def build_profile(role, years=None, skills=None, taxonomy=None):
+    """Canonical market profile: normalized role, seniority band and the top skills in taxonomy form"""
+    taxonomy = taxonomy or get_taxonomy()
+    seniority = Utils.seniority_band(years)
+    if seniority == 'unknown':
+        seniority = title_seniority(role) or seniority
+
+    top = []
+    for skill in skills or []:
+        name = taxonomy.canonical(skill) or re.sub(r'\s+', ' ', str(skill).strip())
+        if name and name not in top:
+            top.append(name)
+    return MarketProfile(
+        canonical_role(role), seniority, tuple(sorted(top[:Config.MARKET_PROFILE_TOP_SKILLS], key=str.lower))
+    )
+
+
+def profile_from_analysis(analysis, taxonomy=None):
+    """Market profile for an analyze_resume result: latest title, experience and strongest skills"""
+    summary = analysis.get('summary') or {}
+    experience = analysis.get('experience') or {}
+    experiences = experience.get('experiences') or [{}]
+    years = Utils.parse_years(summary.get('years_of_experience'))
+    if years is None:
+        years = Utils.parse_years(experience.get('total_years'))
+
+    levels = (analysis.get('skills') or {}).get('expertise_level') or {}
+    skills = (levels.get('expert') or []) + (levels.get('intermediate') or [])
+    return build_profile(experiences[0].get('title'), years, skills, taxonomy)
+
+
+def profile_from_text(text, taxonomy=None):
+    """Market profile for free text, e.g. 'Senior data engineer, 6 years, Python and Spark'"""
+    taxonomy = taxonomy or get_taxonomy()
+    text = text or ''
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), '')
+    # "Senior Data Engineer at Acme (2019 - 2023)" -> "Senior Data Engineer"
+    role = re.split(r',|\(|\||\s[-–—]\s|\s+at\s+', first_line, flags=re.IGNORECASE)[0][:80]
+    years = _YEARS.search(text)
+
+    # The most mentioned skills stand for the profile
+    mentions = Counter(match.name for match in taxonomy.find(text) if not match.ambiguous)
+    skills = [name for name, _ in mentions.most_common()]
+    # Drop the skills from the role so "Python developer" and "developer" share a key
+    for name in skills:
+        role = re.sub(rf'(?<!\w){re.escape(name)}(?!\w)', ' ', role, flags=re.IGNORECASE)
+    return build_profile(role, float(years.group(1)) if years else None, skills, taxonomy)
+
+
+class MarketService:
+    """Market insights memoized per canonical profile and per skill, with stale-while-revalidate refresh"""
+
+    PROFILE_PROMPT = """
+        Provide current job market insights for a {seniority}-level {role}{skills} in the following JSON format:
+        {{
+            "salary_range": {{
+                "average": "Average salary for this profile",
+                "range": "Expected salary range"
+            }},
+            "demand": {{
+                "trend": "Current market trend",
+                "growth_rate": "Expected growth rate"
+            }},
+            "in_demand_skills": ["Skill employers want most for this profile"],
+            "growth_areas": ["Industry or domain that is growing for this profile"],
+            "career_paths": ["Typical next role"]
+        }}
+        """
+
+    SKILL_DEMAND_PROMPT = """
+        Analyze current market demand for each of these skills: {skills}
+        Provide a JSON object with one entry per skill, keyed by the skill name exactly as given:
+        {{
+            "<skill>": {{
+                "demand": "Current market demand and why",
+                "growth_potential": "Future growth potential",
+                "industries": ["Industry that values this skill most"]
+            }}
+        }}
+        """
+
+    # Shared across instances, so identical lookups in the same process run once
+    _inflight = SingleFlight()
+    _refreshing = set()
+    _refreshing_lock = threading.Lock()
+
+    def __init__(self, model=None, path=None, refresh_after=None, max_age=None):
+        self.model = model or get_client()
+        self.path = path or Config.MARKET_DB_PATH
+        # Entries older than refresh_after are served while a refresh runs; past max_age they are recomputed first
+        self.refresh_after = refresh_after or Config.MARKET_REFRESH_SECONDS
+        self.max_age = max(max_age or Config.MARKET_MAX_AGE_SECONDS, self.refresh_after)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS market_insights (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_market_insights_updated ON market_insights (updated_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def profile_key(profile):
+        return f"profile:{profile.role}|{profile.seniority}|{','.join(profile.skills).lower()}"
+
+    @staticmethod
+    def skill_key(skill):
+        return f"skill:{skill.lower()}"
+
+    def profile_insights(self, profile):
+        """Salary, demand and growth data for a MarketProfile"""
+        return self._get(self.profile_key(profile), 'profile', list(profile), self._fetch_profile)
+
+    def skill_demand(self, skills):
+        """Demand data for each skill; all the missing ones are fetched with a single prompt"""
+        skills = list(dict.fromkeys(skills))
+        result = {}
+        missing = []
+        stale = []
+        for skill in skills:
+            value, age = self._lookup(self.skill_key(skill))
+            if value is None or age >= self.max_age:
+                missing.append(skill)
+                continue
+            result[skill] = value
+            if age >= self.refresh_after:
+                stale.append(skill)
+            metrics.incr('market_requests_total', result='stale' if age >= self.refresh_after else 'fresh')
+
+        if stale:
+            self._refresh_in_background('skills:' + ','.join(sorted(stale)), self._store_skills, stale)
+        if missing:
+            metrics.incr('market_requests_total', len(missing), result='miss')
+        for i in range(0, len(missing), Config.MARKET_SKILL_BATCH_SIZE):
+            batch = missing[i:i + Config.MARKET_SKILL_BATCH_SIZE]
+            key = 'skills:' + ','.join(sorted(batch, key=str.lower))
+            result.update(self._inflight.do(key, self._store_skills, batch))
+        return {skill: result[skill] for skill in skills if skill in result}
+
+    def _get(self, key, kind, subject, fetch):
+        value, age = self._lookup(key)
+        if value is not None and age < self.refresh_after:
+            metrics.incr('market_requests_total', result='fresh')
+            return value
+        if value is not None and age < self.max_age:
+            # Serve what we have and bring it up to date for the next caller
+            metrics.incr('market_requests_total', result='stale')
+            self._refresh_in_background(key, self._compute, key, kind, subject, fetch)
+            return value
+
+        metrics.incr('market_requests_total', result='miss')
+        return self._inflight.do(key, self._compute, key, kind, subject, fetch)
+
+    def _lookup(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, updated_at FROM market_insights WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def _store(self, key, kind, subject, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO market_insights (key, kind, subject, value, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(subject), json.dumps(value), time.time())
+            )
+            self._conn.commit()
+
+    def _compute(self, key, kind, subject, fetch):
+        value = fetch(subject)
+        self._store(key, kind, subject, value)
+        return value
+
+    def _refresh_in_background(self, key, fn, *args):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Error refreshing market insights for {key}: {str(e)}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=metrics.bind(refresh), daemon=True).start()
+
+    def _fetch_profile(self, subject):
+        role, seniority, skills = subject
+        prompt = self.PROFILE_PROMPT.format(
+            role=role, seniority=seniority, skills=f" skilled in {', '.join(skills)}" if skills else ''
+        )
+        response = self.model.generate_content(prompt)
+        record, invalid = MarketTrends.from_dict(decode_json(response.text, dict))
+        if invalid:
+            raise ValueError(f"Invalid market insights: {', '.join(invalid)}")
+        return record.to_dict()
+
+    def _store_skills(self, skills):
+        prompt = self.SKILL_DEMAND_PROMPT.format(skills=', '.join(skills))
+        response = self.model.generate_content(prompt)
+        data = decode_json(response.text, dict)
+
+        # Match the model's keys back to ours regardless of case
+        entries = {str(name).strip().lower(): value for name, value in data.items()}
+        result = {}
+        for skill in skills:
+            record, invalid = SkillDemand.from_dict(entries.get(skill.lower()))
+            if invalid:
+                continue
+            result[skill] = record.to_dict()
+            self._store(self.skill_key(skill), 'skill', skill, result[skill])
+        return result
+
+    def refresh_stale(self, limit=None):
+        """Recompute entries older than the refresh interval, oldest first; returns how many were refreshed"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, kind, subject FROM market_insights WHERE updated_at < ? ORDER BY updated_at LIMIT ?",
+                (time.time() - self.refresh_after, -1 if limit is None else limit)
+            ).fetchall()
+
+        refreshed = 0
+        skills = [json.loads(subject) for _, kind, subject in rows if kind == 'skill']
+        for key, kind, subject in rows:
+            if kind != 'profile':
+                continue
+            try:
+                self._compute(key, kind, json.loads(subject), self._fetch_profile)
+                refreshed += 1
+            except Exception as e:
+                print(f"Error refreshing market insights for {key}: {str(e)}")
+        # Skills go out in batches, like the original lookups
+        for i in range(0, len(skills), Config.MARKET_SKILL_BATCH_SIZE):
+            try:
+                refreshed += len(self._store_skills(skills[i:i + Config.MARKET_SKILL_BATCH_SIZE]))
+            except Exception as e:
+                print(f"Error refreshing skill demand: {str(e)}")
+        return refreshed
+
+    def clear(self):
+        """Remove every stored entry"""
+        with self._lock:
+            self._conn.execute("DELETE FROM market_insights")
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(*), SUM(updated_at < ?) FROM market_insights GROUP BY kind",
+                (time.time() - self.refresh_after,)
+            ).fetchall()
+        return {kind: {"entries": count, "stale": stale or 0} for kind, count, stale in rows}
+
+
+def main(argv=None):
+    arg_parser = argparse.ArgumentParser(description="Maintain the market insights table")
+    arg_parser.add_argument('--db', default=Config.MARKET_DB_PATH, help="Path to the market insights database")
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+    refresh_parser = commands.add_parser('refresh', help="Recompute entries past the refresh interval")
+    refresh_parser.add_argument('--limit', type=int, default=None, help="Refresh at most this many entries")
+    commands.add_parser('stats', help="Show entry counts")
+    args = arg_parser.parse_args(argv)
+
+    service = MarketService(path=args.db)
+    if args.command == 'stats':
+        print(json.dumps(service.stats(), indent=2))
+    else:
+        print(service.refresh_stale(args.limit))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
\ No newline at end of file
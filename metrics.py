@@ -0,0 +1,249 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+
+PREFIX = 'resume_analyzer'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float('inf'))
+
+METRIC_HELP = {
+    'stage_seconds': "Time spent in each processing stage",
+    'stage_errors_total': "Stage executions that raised",
+    'stage_input_size_total': "Input size handled by each stage (bytes, characters or tokens)",
+    'stage_output_size_total': "Output size produced by each stage (bytes or characters)",
+    'cache_requests_total': "Analysis cache lookups by result",
+    'document_store_requests_total': "Extracted text store lookups by result",
+    'admission_rejections_total': "Documents rejected before or during extraction, by reason",
+    'market_requests_total': "Market insight lookups by freshness (fresh, stale or miss)",
+    'question_bank_requests_total': "Question bank lookups by result (hit, or miss when questions had to be generated)",
+    'llm_retries_total': "Model calls retried after a transient error",
+    'coalesced_requests_total': "Requests that joined an identical in-flight request",
+}
+
+_current_trace = contextvars.ContextVar('metrics_trace', default=None)
+
+
+class Trace:
+    """Collects the stage timings of one request, across the threads it fans out to"""
+
+    def __init__(self):
+        self.spans = []
+        self.started = time.perf_counter()
+
+    def breakdown(self):
+        """Per-stage totals for the report"""
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.stage, {"calls": 0, "seconds": 0.0})
+            stage['calls'] += 1
+            stage['seconds'] += span.seconds
+            for name in ('input_size', 'output_size'):
+                value = getattr(span, name)
+                if value is not None:
+                    stage[name] = stage.get(name, 0) + value
+        for stage in stages.values():
+            stage['seconds'] = round(stage['seconds'], 4)
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": stages,
+        }
+
+
+class Span:
+    """Times one execution of a stage; set input_size/output_size inside the block"""
+    __slots__ = ('registry', 'trace', 'stage', 'started', 'seconds', 'input_size', 'output_size')
+
+    def __init__(self, registry, trace, stage):
+        self.registry = registry
+        self.trace = trace
+        self.stage = stage
+        self.seconds = 0.0
+        self.input_size = None
+        self.output_size = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self.started
+        if self.trace is not None:
+            self.trace.spans.append(self)
+        if self.registry.enabled:
+            self.registry.record(self, failed=exc_type is not None)
+        return False
+
+
+class _NullSpan:
+    """Stand-in used when nothing is listening, so instrumented code costs next to nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """Process-wide registry of stage histograms and counters with Prometheus text export"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def span(self, stage):
+        """Context manager timing one stage; a no-op unless metrics or a trace are active"""
+        trace = _current_trace.get()
+        if not self.enabled and trace is None:
+            return NULL_SPAN
+        return Span(self, trace, stage)
+
+    def incr(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record(self, span, failed=False):
+        labels = (('stage', span.stage),)
+        with self._lock:
+            histogram = self._histograms.get(labels)
+            if histogram is None:
+                histogram = self._histograms[labels] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if span.seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += span.seconds
+            histogram[-1] += 1
+
+        if failed:
+            self.incr('stage_errors_total', stage=span.stage)
+        if span.input_size is not None:
+            self.incr('stage_input_size_total', span.input_size, stage=span.stage)
+        if span.output_size is not None:
+            self.incr('stage_output_size_total', span.output_size, stage=span.stage)
+
+    def trace(self):
+        """Start collecting a per-request timing breakdown in the current context"""
+        return _TraceScope()
+
+    @staticmethod
+    def bind(fn):
+        """Wrap fn so it runs in the caller's context (and trace) when handed to another thread"""
+        return functools.partial(contextvars.copy_context().run, fn)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self):
+        """Current values in the Prometheus text exposition format"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {labels: list(values) for labels, values in self._histograms.items()}
+
+        lines = []
+        if histograms:
+            name = f"{PREFIX}_stage_seconds"
+            lines += [f"# HELP {name} {METRIC_HELP['stage_seconds']}", f"# TYPE {name} histogram"]
+            for labels, values in sorted(histograms.items()):
+                for bound, count in zip(BUCKETS, values):
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+
+        for metric in sorted({name for name, _ in counters}):
+            name = f"{PREFIX}_{metric}"
+            lines += [f"# HELP {name} {METRIC_HELP.get(metric, metric)}", f"# TYPE {name} counter"]
+            for (counter, labels), value in sorted(counters.items()):
+                if counter == metric:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=None):
+        """Write the metrics to a file, e.g. for the node exporter's textfile collector"""
+        path = path or Config.METRICS_FILE
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(path + '.tmp', path)
+
+    def serve(self, port=None, host='0.0.0.0'):
+        """Expose /metrics over HTTP from a background thread (once per process)"""
+        with self._lock:
+            if self._server is None:
+                registry = self
+
+                class Handler(BaseHTTPRequestHandler):
+                    def do_GET(self):
+                        if self.path.split('?')[0] != '/metrics':
+                            self.send_error(404)
+                            return
+                        body = registry.render().encode('utf-8')
+                        self.send_response(200)
+                        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                        self.send_header('Content-Length', str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+
+                    def log_message(self, *args):
+                        pass
+
+                self._server = ThreadingHTTPServer((host, port or Config.METRICS_PORT), Handler)
+                threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+class _TraceScope:
+    def __enter__(self):
+        self.trace = Trace()
+        self._token = _current_trace.set(self.trace)
+        return self.trace
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_trace.reset(self._token)
+        return False
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        key + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def instrument(stage):
+    """Decorator timing every call of a function as the given stage"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metrics.span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+metrics = Metrics(Config.METRICS_ENABLED)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdftypes import resolve1
+
+# Layout analysis presets, trading reading-order fidelity for speed
+LAPARAMS_PRESETS = {
+    # Skip the text box ordering pass and vertical text detection
+    'fast': {'boxes_flow': None, 'detect_vertical': False, 'all_texts': False},
+    # pdfminer defaults, identical to extract_text()
+    'accurate': {},
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def make_laparams(preset='accurate'):
+    """Build LAParams for a named preset"""
+    if preset not in LAPARAMS_PRESETS:
+        raise ValueError(f"Unknown layout preset: {preset}. Available: {list(LAPARAMS_PRESETS)}")
+    return LAParams(**LAPARAMS_PRESETS[preset])
+
+
+def _open_source(source):
+    """Return a binary file object for a path, bytes or file-like source"""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+
+def count_pages(source):
+    """Read the page count from the document catalog without laying out any page"""
+    fp = _open_source(source)
+    try:
+        document = PDFDocument(PDFParser(fp))
+        pages = resolve1(document.catalog.get('Pages'))
+        count = resolve1(pages.get('Count')) if pages else None
+        if isinstance(count, int):
+            return count
+        return sum(1 for _ in PDFPage.create_pages(document))
+    finally:
+        if isinstance(source, (str, os.PathLike)):
+            fp.close()
+
+
+def iter_pdf_pages(source, preset='accurate', page_numbers=None, max_pages=None, max_chars=None):
+    """Yield page text as each page is laid out, stopping at the page/char budget"""
+    # Pages keep pdfminer's trailing form feed, so ''.join() matches extract_text()
+    fp = _open_source(source)
+    output = io.StringIO()
+    rsrcmgr = PDFResourceManager(caching=True)
+    device = TextConverter(rsrcmgr, output, laparams=make_laparams(preset))
+    interpreter = PDFPageInterpreter(rsrcmgr, device)
+    remaining = max_chars
+
+    try:
+        pages = PDFPage.get_pages(fp, page_numbers, maxpages=max_pages or 0, caching=True)
+        for page in pages:
+            interpreter.process_page(page)
+            text = output.getvalue()
+            output.seek(0)
+            output.truncate()
+
+            if remaining is not None:
+                text = text[:remaining]
+                remaining -= len(text)
+
+            yield text
+
+            if remaining is not None and remaining <= 0:
+                break
+    finally:
+        device.close()
+        if isinstance(source, (str, os.PathLike)):
+            fp.close()
+
+
+def _extract_page_range(source, page_numbers, preset):
+    """Worker entry point: extract a contiguous run of pages"""
+    return ''.join(iter_pdf_pages(source, preset, page_numbers=set(page_numbers)))
+
+
+def _get_pool(workers):
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(workers)
+        return _pools[workers]
+
+
+def extract_pdf_text(source, preset='accurate', max_pages=None, max_chars=None,
+                     workers=1, min_parallel_pages=8):
+    """Extract text from a PDF, fanning pages out across processes for long documents"""
+    if workers <= 1:
+        return ''.join(iter_pdf_pages(source, preset, max_pages=max_pages, max_chars=max_chars))
+
+    # Workers need something picklable: a path, or the raw bytes of an in-memory file
+    if isinstance(source, (bytearray, memoryview)):
+        source = bytes(source)
+    elif not isinstance(source, (str, os.PathLike, bytes)):
+        source.seek(0)
+        source = source.read()
+
+    page_count = count_pages(source)
+    if max_pages:
+        page_count = min(page_count, max_pages)
+
+    if page_count < min_parallel_pages:
+        return ''.join(iter_pdf_pages(source, preset, max_pages=max_pages, max_chars=max_chars))
+
+    chunk_size = -(-page_count // workers)
+    chunks = [range(start, min(start + chunk_size, page_count))
+              for start in range(0, page_count, chunk_size)]
+
+    pool = _get_pool(workers)
+    text = ''.join(pool.map(_extract_page_range, [source] * len(chunks), chunks, [preset] * len(chunks)))
+    return text[:max_chars] if max_chars else text
\ No newline at end of file
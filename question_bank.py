@@ -0,0 +1,153 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from config import Config
+
+# Technical question levels, as the generation prompt describes them
+DIFFICULTIES = {
+    'basic': "concept questions",
+    'intermediate': "problem-solving scenarios",
+    'advanced': "experience-based and design questions",
+}
+
+_WORDS = re.compile(r'[a-z0-9+#]+')
+# Filler words that make rephrasings of one question look different
+_STOPWORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'to', 'for', 'and', 'or', 'is', 'are', 'do', 'does', 'you', 'your',
+    'how', 'what', 'whats', 'can', 'would', 'could', 'please', 'explain', 'describe', 'between', 'with',
+}
+
+
+def _stem(word):
+    for suffix in ('ing', 'ed', 'es', 's'):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def simhash(text):
+    """64-bit SimHash over the words of a question, for near-duplicate detection"""
+    # Word order and inflection vary between rephrasings, so the features are a set of word stems
+    features = {_stem(word) for word in _WORDS.findall(text.lower().replace("'", '')) if word not in _STOPWORDS}
+    weights = [0] * 64
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class QuestionBank:
+    """SQLite bank of interview questions indexed by kind, normalized subject and difficulty"""
+
+    def __init__(self, path=None, duplicate_bits=None):
+        self.path = path or Config.QUESTION_BANK_PATH
+        self.duplicate_bits = Config.QUESTION_DUPLICATE_BITS if duplicate_bits is None else duplicate_bits
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                question TEXT NOT NULL,
+                simhash TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_questions_subject ON questions (kind, subject, difficulty)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def normalize(subject):
+        return re.sub(r'\s+', ' ', str(subject).strip().lower())
+
+    def get(self, kind, subject, difficulty, limit=None):
+        """Stored questions for one subject and difficulty, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question FROM questions WHERE kind = ? AND subject = ? AND difficulty = ? "
+                "ORDER BY id LIMIT ?",
+                (kind, self.normalize(subject), difficulty, -1 if limit is None else limit)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def counts(self, kind, subjects):
+        """Number of stored questions per (subject, difficulty) for the given subjects"""
+        keys = {self.normalize(subject): subject for subject in subjects}
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT subject, difficulty, COUNT(*) FROM questions "
+                f"WHERE kind = ? AND subject IN ({placeholders}) GROUP BY subject, difficulty",
+                (kind, *keys)
+            ).fetchall()
+        return {(keys[subject], difficulty): count for subject, difficulty, count in rows}
+
+    def add(self, kind, subject, difficulty, questions):
+        """Store new questions, skipping near-duplicates of each other and of what the subject already has"""
+        subject = self.normalize(subject)
+        with self._lock:
+            # Compare against every difficulty, so a question isn't banked twice at different levels
+            existing = [
+                int(row[0], 16) for row in self._conn.execute(
+                    "SELECT simhash FROM questions WHERE kind = ? AND subject = ?", (kind, subject)
+                )
+            ]
+            added = []
+            now = time.time()
+            for question in questions:
+                question = re.sub(r'\s+', ' ', str(question)).strip()
+                if not question:
+                    continue
+                fingerprint = simhash(question)
+                if any(_distance(fingerprint, other) <= self.duplicate_bits for other in existing):
+                    continue
+                existing.append(fingerprint)
+                added.append(question)
+                self._conn.execute(
+                    "INSERT INTO questions (kind, subject, difficulty, question, simhash, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (kind, subject, difficulty, question, f"{fingerprint:016x}", now)
+                )
+            self._conn.commit()
+        return added
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, COUNT(DISTINCT subject), COUNT(*) FROM questions GROUP BY kind"
+            ).fetchall()
+        return {kind: {"subjects": subjects, "questions": count} for kind, subjects, count in rows}
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_bank(path=None):
+    """Return the process-wide question bank for a path, opening it on first use"""
+    path = path or Config.QUESTION_BANK_PATH
+    with _banks_lock:
+        if path not in _banks:
+            _banks[path] = QuestionBank(path)
+        return _banks[path]
\ No newline at end of file
@@ -1,28 +1,127 @@
+from config import Config
+from document_store import resolve_text
+from llm_client import get_client
+from market_service import profile_from_text
+from metrics import instrument, metrics
+from question_bank import DIFFICULTIES, get_bank
+from response_schema import decode_json
+from single_flight import SingleFlight
+from skill_taxonomy import get_taxonomy
+
 class QuestionGenerator:
-    def __init__(self, model):
-        self.model = model
-    
+    TECHNICAL_PROMPT = """
+        Generate technical interview questions for each of these skills: {skills}
+
+        For every skill write {count} questions at each difficulty:
+        {levels}
+
+        Return a JSON object keyed by the skill name exactly as given:
+        {{
+            "<skill>": {{{example}}}
+        }}
+        """
+
+    BEHAVIORAL_PROMPT = """
+        Generate {count} behavioral interview questions for a {profile}.
+        Return only a JSON list of question strings.
+        """
+
+    # Shared across instances, so candidates with the same missing skills wait for one generation
+    _inflight = SingleFlight()
+
+    def __init__(self, model=None, bank=None, taxonomy=None):
+        self.model = model or get_client()
+        self.bank = bank or get_bank()
+        self.taxonomy = taxonomy or get_taxonomy()
+
+    def technical_questions(self, skills):
+        """Questions per skill and difficulty, generating only for skills the bank has too few of"""
+        names = self.taxonomy.normalize_skills(skills)
+        count = Config.QUESTIONS_PER_LEVEL
+        counts = self.bank.counts('technical', names)
+        missing = [
+            name for name in names if any(counts.get((name, level), 0) < count for level in DIFFICULTIES)
+        ]
+        if len(missing) < len(names):
+            metrics.incr('question_bank_requests_total', len(names) - len(missing), result='hit')
+        if missing:
+            metrics.incr('question_bank_requests_total', len(missing), result='miss')
+
+        # One prompt per batch of missing skills rather than one per candidate
+        for i in range(0, len(missing), Config.QUESTION_BATCH_SIZE):
+            batch = missing[i:i + Config.QUESTION_BATCH_SIZE]
+            key = 'technical:' + ','.join(sorted(self.bank.normalize(name) for name in batch))
+            self._inflight.do(key, self._generate_technical, batch)
+
+        return {
+            name: {level: self.bank.get('technical', name, level, count) for level in DIFFICULTIES}
+            for name in names
+        }
+
+    def _generate_technical(self, skills):
+        levels = '\n        '.join(f"- {level}: {description}" for level, description in DIFFICULTIES.items())
+        example = ', '.join(f'"{level}": ["Question"]' for level in DIFFICULTIES)
+        # One spare per level, so a dropped near-duplicate doesn't leave the skill short
+        prompt = self.TECHNICAL_PROMPT.format(
+            skills=', '.join(skills), count=Config.QUESTIONS_PER_LEVEL + 1, levels=levels, example=example
+        )
+        try:
+            response = self.model.generate_content(prompt)
+            data = decode_json(response.text, dict)
+        except Exception as e:
+            print(f"Error generating technical questions: {str(e)}")
+            return
+
+        # Match the model's keys back to ours regardless of case
+        entries = {str(name).strip().lower(): value for name, value in data.items()}
+        for skill in skills:
+            levels = entries.get(skill.lower())
+            if not isinstance(levels, dict):
+                continue
+            for level in DIFFICULTIES:
+                questions = levels.get(level)
+                if isinstance(questions, list):
+                    self.bank.add('technical', skill, level, questions)
+
+    def behavioral_questions(self, experience):
+        """Questions for the candidate's role and seniority, generated once per role and level"""
+        profile = profile_from_text(resolve_text(experience), self.taxonomy)
+        count = Config.BEHAVIORAL_QUESTIONS
+        stored = self.bank.counts('behavioral', [profile.role]).get((profile.role, profile.seniority), 0)
+        if stored >= count:
+            metrics.incr('question_bank_requests_total', result='hit')
+        else:
+            metrics.incr('question_bank_requests_total', result='miss')
+            key = f"behavioral:{self.bank.normalize(profile.role)}|{profile.seniority}"
+            self._inflight.do(key, self._generate_behavioral, profile.role, profile.seniority)
+        return self.bank.get('behavioral', profile.role, profile.seniority, count)
+
+    def _generate_behavioral(self, role, seniority):
+        described = role if seniority == 'unknown' else f"{seniority}-level {role}"
+        prompt = self.BEHAVIORAL_PROMPT.format(count=Config.BEHAVIORAL_QUESTIONS + 1, profile=described)
+        try:
+            response = self.model.generate_content(prompt)
+            questions = decode_json(response.text, list)
+        except Exception as e:
+            print(f"Error generating behavioral questions: {str(e)}")
+            return
+        self.bank.add('behavioral', role, seniority, questions)
+
+    @instrument('question_gen.generate_technical_questions')
     def generate_technical_questions(self, skills):
         """Generate technical interview questions"""
-        prompt = f"""
-        Generate technical interview questions for these skills:
-        {skills}
-        
-        Include:
-        1. Basic concept questions
-        2. Problem-solving scenarios
-        3. Experience-based questions
-        """
-        response = self.model.generate_content(prompt)
-        return response.text
-    
+        sections = []
+        for skill, levels in self.technical_questions(skills).items():
+            lines = [f"### {skill}"]
+            for level, questions in levels.items():
+                if questions:
+                    lines.append(f"**{level.capitalize()}**")
+                    lines += [f"{i}. {question}" for i, question in enumerate(questions, 1)]
+            sections.append('\n'.join(lines))
+        return '\n\n'.join(sections)
+
+    @instrument('question_gen.generate_behavioral_questions')
     def generate_behavioral_questions(self, experience):
         """Generate behavioral interview questions"""
-        prompt = f"""
-        Based on this experience:
-        {experience}
-        
-        Generate relevant behavioral interview questions.
-        """
-        response = self.model.generate_content(prompt)
-        return response.text
\ No newline at end of file
+        questions = self.behavioral_questions(experience)
+        return '\n'.join(f"{i}. {question}" for i, question in enumerate(questions, 1))
\ No newline at end of file
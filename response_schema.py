@@ -0,0 +1,376 @@
+import itertools
+import json
+import re
+
+# Curly quotes models sometimes emit in place of JSON's straight quotes
+_CURLY_QUOTES = '“”'
+_LITERAL_REPAIRS = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+
+class DecodeError(ValueError):
+    pass
+
+
+# Start points tried before giving up; prose rarely holds more than a bracket or two
+_MAX_CANDIDATES = 8
+
+
+def decode_json(text, expect=None):
+    """Parse model output as JSON, repairing it in one pass from each likely start point
+
+    expect (dict or list) is the top-level type the caller wants; a bracket in the prose before it,
+    or a start point that doesn't parse, is skipped in favour of the next one.
+    """
+    openers = '{' if expect is dict else '{['
+    candidates = list(itertools.islice((i for i, char in enumerate(text) if char in openers), _MAX_CANDIDATES))
+    if not candidates:
+        raise DecodeError("No JSON object found in the response")
+    first_object = text.find('{')
+
+    error = None
+    for start in candidates:
+        try:
+            value, end = _repair(text, start)
+        except DecodeError as e:
+            error = e
+            continue
+        if expect is not None and not isinstance(value, expect):
+            error = DecodeError(f"Response is not a JSON {expect.__name__}")
+            continue
+        if expect is None and isinstance(value, list) and end < first_object:
+            # A bracketed aside like "(see [1])" ahead of the real object
+            continue
+        return value
+    raise error or DecodeError("No JSON object found in the response")
+
+
+def _repair(text, start):
+    """Repair and parse the JSON value starting at text[start]; returns (value, index where it ended)"""
+    # Skips fences and prose around the object, and repairs curly quotes, Python
+    # literals, trailing commas, raw newlines in strings and truncated output
+    out = []
+    stack = []
+    in_string = False
+    curly_string = False
+    escaped = False
+    i = start
+    length = len(text)
+
+    while i < length:
+        char = text[i]
+
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"' and curly_string:
+                char = '\\"'
+            elif char == '"' or (curly_string and char == '”'):
+                char = '"'
+                in_string = False
+            elif char == '\n':
+                char = '\\n'
+            elif char == '\t':
+                char = '\\t'
+            out.append(char)
+            i += 1
+            continue
+
+        if char == '"' or char in _CURLY_QUOTES:
+            curly_string = char != '"'
+            char = '"'
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]':
+            # Drop a trailing comma before the closing bracket
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ',':
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+            i += 1
+            continue
+        elif char.isalpha():
+            word = re.match(r'[A-Za-z]+', text[i:]).group(0)
+            out.append(_LITERAL_REPAIRS.get(word, word))
+            i += len(word)
+            continue
+
+        out.append(char)
+        i += 1
+
+    # Close whatever a truncated response left open
+    if in_string:
+        out.append('"')
+    while out and (out[-1].isspace() or out[-1] == ','):
+        out.pop()
+    if out and out[-1] == ':':
+        out.append('null')
+    out.extend(reversed(stack))
+
+    try:
+        return json.loads(''.join(out)), i
+    except json.JSONDecodeError as e:
+        raise DecodeError(f"Could not parse the response: {str(e)}")
+
+
+class Field:
+    """Describes one field of a record: its kind and, for nested kinds, the record type"""
+    __slots__ = ('kind', 'record')
+
+    def __init__(self, kind, record=None):
+        self.kind = kind
+        self.record = record
+
+
+class Record:
+    """Base for slotted response records built from validated model output"""
+    __slots__ = ()
+    FIELDS = {}
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name, _default(self.FIELDS[name])))
+
+    @classmethod
+    def from_dict(cls, data, path=''):
+        """Build a record, returning it with the dotted paths of invalid or missing fields"""
+        invalid = []
+        values = {}
+        if not isinstance(data, dict):
+            return cls(), [path or cls.__name__]
+
+        for name, field in cls.FIELDS.items():
+            field_path = f"{path}.{name}" if path else name
+            if name not in data:
+                # Free-text leaves may legitimately be left out; structure and scores may not
+                if field.kind in ('record', 'records', 'score'):
+                    invalid.append(field_path)
+                continue
+            value, errors = _coerce(field, data[name], field_path)
+            invalid.extend(errors)
+            if value is not None:
+                values[name] = value
+
+        return cls(**values), invalid
+
+    def to_dict(self):
+        return {name: _to_plain(getattr(self, name)) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+def _default(field):
+    if field.kind == 'record':
+        return field.record()
+    if field.kind in ('list', 'records'):
+        return []
+    return "0" if field.kind == 'score' else ""
+
+
+def _coerce(field, value, path):
+    """Return (value, invalid paths); value is None when the default should be used"""
+    if field.kind == 'str':
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return str(value), []
+        return None, [path]
+
+    if field.kind == 'score':
+        match = re.search(r'\d+(?:\.\d+)?', str(value)) if not isinstance(value, bool) else None
+        if match and 0 <= float(match.group(0)) <= 100:
+            return str(int(round(float(match.group(0))))), []
+        return None, [path]
+
+    if field.kind == 'list':
+        if isinstance(value, str):
+            value = [value]
+        if isinstance(value, list):
+            return [str(item) for item in value if isinstance(item, (str, int, float))], []
+        return None, [path]
+
+    if field.kind == 'record':
+        return field.record.from_dict(value, path)
+
+    if field.kind == 'records':
+        if not isinstance(value, list):
+            return None, [path]
+        items, invalid = [], []
+        for index, item in enumerate(value):
+            record, errors = field.record.from_dict(item, f"{path}[{index}]")
+            items.append(record)
+            invalid.extend(errors)
+        return items, invalid
+
+    raise ValueError(f"Unknown field kind: {field.kind}")
+
+
+def _to_plain(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_to_plain(item) for item in value]
+    return value
+
+
+class AIRating(Record):
+    __slots__ = ('overall', 'skills_rating', 'experience_rating', 'education_rating')
+    FIELDS = {name: Field('score') for name in __slots__}
+
+
+class Summary(Record):
+    __slots__ = ('brief', 'years_of_experience', 'ai_rating')
+    FIELDS = {
+        'brief': Field('str'),
+        'years_of_experience': Field('str'),
+        'ai_rating': Field('record', AIRating),
+    }
+
+
+class ExpertiseLevel(Record):
+    __slots__ = ('expert', 'intermediate', 'beginner')
+    FIELDS = {name: Field('list') for name in __slots__}
+
+
+class Skills(Record):
+    __slots__ = ('expertise_level',)
+    FIELDS = {'expertise_level': Field('record', ExpertiseLevel)}
+
+
+class Achievement(Record):
+    __slots__ = ('title', 'description', 'impact')
+    FIELDS = {name: Field('str') for name in __slots__}
+
+
+class Role(Record):
+    __slots__ = ('title', 'company', 'duration', 'responsibilities', 'key_achievements')
+    FIELDS = {
+        'title': Field('str'),
+        'company': Field('str'),
+        'duration': Field('str'),
+        'responsibilities': Field('list'),
+        'key_achievements': Field('list'),
+    }
+
+
+class Experience(Record):
+    __slots__ = ('total_years', 'experiences')
+    FIELDS = {
+        'total_years': Field('str'),
+        'experiences': Field('records', Role),
+    }
+
+
+class Degree(Record):
+    __slots__ = ('degree', 'institution', 'year', 'achievements')
+    FIELDS = {
+        'degree': Field('str'),
+        'institution': Field('str'),
+        'year': Field('str'),
+        'achievements': Field('list'),
+    }
+
+
+class Education(Record):
+    __slots__ = ('education',)
+    FIELDS = {'education': Field('records', Degree)}
+
+
+class Certification(Record):
+    __slots__ = ('name', 'issuer', 'year')
+    FIELDS = {name: Field('str') for name in __slots__}
+
+
+class SalaryRange(Record):
+    __slots__ = ('average', 'range')
+    FIELDS = {name: Field('str') for name in __slots__}
+
+
+class Demand(Record):
+    __slots__ = ('trend', 'growth_rate')
+    FIELDS = {name: Field('str') for name in __slots__}
+
+
+class MarketInsights(Record):
+    __slots__ = ('salary_range', 'demand')
+    FIELDS = {
+        'salary_range': Field('record', SalaryRange),
+        'demand': Field('record', Demand),
+    }
+
+
+class MarketTrends(Record):
+    __slots__ = ('salary_range', 'demand', 'in_demand_skills', 'growth_areas', 'career_paths')
+    FIELDS = {
+        'salary_range': Field('record', SalaryRange),
+        'demand': Field('record', Demand),
+        'in_demand_skills': Field('list'),
+        'growth_areas': Field('list'),
+        'career_paths': Field('list'),
+    }
+
+
+class SkillDemand(Record):
+    __slots__ = ('demand', 'growth_potential', 'industries')
+    FIELDS = {
+        'demand': Field('str'),
+        'growth_potential': Field('str'),
+        'industries': Field('list'),
+    }
+
+
+class Suggestions(Record):
+    __slots__ = ('resume_improvements', 'skill_improvements', 'career_growth')
+    FIELDS = {name: Field('list') for name in __slots__}
+
+
+class ResumeAnalysis(Record):
+    __slots__ = (
+        'summary', 'skills', 'achievements', 'experience', 'education',
+        'certifications', 'market_insights', 'suggestions'
+    )
+    FIELDS = {
+        'summary': Field('record', Summary),
+        'skills': Field('record', Skills),
+        'achievements': Field('records', Achievement),
+        'experience': Field('record', Experience),
+        'education': Field('record', Education),
+        'certifications': Field('records', Certification),
+        'market_insights': Field('record', MarketInsights),
+        'suggestions': Field('record', Suggestions),
+    }
+
+
+class JobMatch(Record):
+    __slots__ = (
+        'match_percentage', 'skills_match', 'experience_match',
+        'missing_skills', 'matching_skills', 'recommendations'
+    )
+    FIELDS = {
+        'match_percentage': Field('score'),
+        'skills_match': Field('score'),
+        'experience_match': Field('score'),
+        'missing_skills': Field('list'),
+        'matching_skills': Field('list'),
+        'recommendations': Field('list'),
+    }
+
+
+def decode_section(section, data):
+    """Validate one top-level analysis section, returning (plain value, invalid paths)"""
+    value, invalid = _coerce(ResumeAnalysis.FIELDS[section], data, section)
+    if value is None:
+        value = _default(ResumeAnalysis.FIELDS[section])
+    return _to_plain(value), invalid
+
+
+def invalid_sections(invalid):
+    """Collapse dotted invalid paths to their top-level field names"""
+    return sorted({re.split(r'[.\[]', path, 1)[0] for path in invalid})
\ No newline at end of file
@@ -0,0 +1,255 @@
+import json
+import os
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from local_scorer import LocalScorer
+from metrics import instrument
+from utils import Utils
+
+INDEX_VERSION = 1
+POSTING_DTYPE = np.dtype([('doc', '<u4'), ('tf', '<u4')])
+EXPERTISE_LEVELS = ['beginner', 'intermediate', 'expert']
+
+# Skills listed in the parsed analysis count as this many extra term occurrences
+SKILL_BOOST = 3
+
+
+class ResumeIndex:
+    """Incremental inverted index over resume text with BM25 ranking"""
+
+    def __init__(self, path=None, scorer=None, k1=1.5, b=0.75):
+        self.path = path
+        self.scorer = scorer or LocalScorer()
+        self.k1 = k1
+        self.b = b
+
+        # Metadata for every live document: length, normalized skills by level, years
+        self.docs = {}
+
+        # Read-only base segment loaded from disk
+        self._base_ids = []
+        self._base_terms = {}
+        self._base_postings = np.zeros(0, dtype=POSTING_DTYPE)
+        self._base_live = np.zeros(0, dtype=bool)
+        self._base_lengths = np.zeros(0, dtype=np.float64)
+        self._base_numbers = {}
+
+        # Documents added or updated since the base segment was written
+        self._overlay = {}
+
+        if path and os.path.exists(os.path.join(path, 'meta.json')):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.docs
+
+    def add(self, doc_id, text, skills=None, years=None):
+        """Index a resume, replacing any previous version with the same id"""
+        if doc_id in self.docs:
+            self.delete(doc_id)
+
+        counts = Counter(self.scorer.tokenize(text))
+        levels = {}
+        for level in EXPERTISE_LEVELS:
+            names = [self.scorer.normalize_skill(s) for s in (skills or {}).get(level, []) if s]
+            levels[level] = sorted(set(names))
+            for name in levels[level]:
+                for token in self.scorer.tokenize(name):
+                    counts[token] += SKILL_BOOST
+
+        self._overlay[doc_id] = counts
+        self.docs[doc_id] = {
+            "length": sum(counts.values()),
+            "skills": levels,
+            "years": Utils.parse_years(years),
+        }
+
+    def add_analysis(self, doc_id, text, analysis):
+        """Index a resume using the skills and experience from analyze_resume output"""
+        self.add(
+            doc_id,
+            text,
+            skills=analysis.get('skills', {}).get('expertise_level', {}),
+            years=analysis.get('summary', {}).get('years_of_experience')
+        )
+
+    def update(self, doc_id, text, skills=None, years=None):
+        """Re-index an existing resume"""
+        self.add(doc_id, text, skills, years)
+
+    def delete(self, doc_id):
+        """Remove a resume from the index"""
+        if doc_id not in self.docs:
+            raise KeyError(doc_id)
+        del self.docs[doc_id]
+        self._overlay.pop(doc_id, None)
+        number = self._base_numbers.get(doc_id)
+        if number is not None:
+            self._base_live[number] = False
+
+    @instrument('resume_index.search')
+    def search(self, query, top_k=10, required_skills=None, min_years=None, min_level=None):
+        """Return the top_k resumes for a query as a DataFrame sorted by score"""
+        terms = Counter(self.scorer.tokenize(query))
+        allowed = self._filter(required_skills, min_years, min_level)
+        n_docs = len(self.docs)
+        columns = ['score', 'years', 'matched_skills']
+        if not terms or not n_docs:
+            return pd.DataFrame(columns=columns)
+
+        avg_len = sum(doc['length'] for doc in self.docs.values()) / n_docs
+        base_scores = np.zeros(len(self._base_ids), dtype=np.float64)
+        overlay_scores = Counter()
+
+        for term, query_tf in terms.items():
+            base = self._base_postings_for(term)
+            overlay = [(doc_id, counts[term]) for doc_id, counts in self._overlay.items() if term in counts]
+            df = len(base) + len(overlay)
+            if df == 0:
+                continue
+            idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * query_tf
+
+            if len(base):
+                numbers = base['doc']
+                tf = base['tf'].astype(np.float64)
+                lengths = self._base_lengths[numbers]
+                base_scores[numbers] += idf * tf * (self.k1 + 1) / (
+                    tf + self.k1 * (1 - self.b + self.b * lengths / avg_len)
+                )
+
+            for doc_id, tf in overlay:
+                length = self.docs[doc_id]['length']
+                overlay_scores[doc_id] += idf * tf * (self.k1 + 1) / (
+                    tf + self.k1 * (1 - self.b + self.b * length / avg_len)
+                )
+
+        scores = {
+            self._base_ids[number]: base_scores[number]
+            for number in np.flatnonzero(base_scores)
+        }
+        scores.update(overlay_scores)
+        if allowed is not None:
+            scores = {doc_id: score for doc_id, score in scores.items() if doc_id in allowed}
+
+        wanted = {self.scorer.normalize_skill(s) for s in required_skills or []}
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return pd.DataFrame(
+            [
+                {
+                    "score": round(float(score), 4),
+                    "years": self.docs[doc_id]['years'],
+                    "matched_skills": sorted(wanted & self._all_skills(doc_id)),
+                }
+                for doc_id, score in ranked
+            ],
+            index=[doc_id for doc_id, _ in ranked],
+            columns=columns
+        )
+
+    def _base_postings_for(self, term):
+        entry = self._base_terms.get(term)
+        if entry is None:
+            return self._base_postings[:0]
+        offset, count = entry
+        postings = self._base_postings[offset:offset + count]
+        return postings[self._base_live[postings['doc']]]
+
+    def _all_skills(self, doc_id):
+        skills = self.docs[doc_id]['skills']
+        return {skill for level in EXPERTISE_LEVELS for skill in skills.get(level, [])}
+
+    def _filter(self, required_skills, min_years, min_level):
+        """Return the doc ids that pass the filters, or None when nothing is filtered"""
+        if not required_skills and min_years is None:
+            return None
+
+        wanted = {self.scorer.normalize_skill(s) for s in required_skills or []}
+        levels = EXPERTISE_LEVELS[EXPERTISE_LEVELS.index(min_level):] if min_level else EXPERTISE_LEVELS
+        allowed = set()
+        for doc_id, doc in self.docs.items():
+            if min_years is not None and (doc['years'] is None or doc['years'] < min_years):
+                continue
+            if wanted:
+                have = {skill for level in levels for skill in doc['skills'].get(level, [])}
+                if not wanted <= have:
+                    continue
+            allowed.add(doc_id)
+        return allowed
+
+    def save(self, path=None):
+        """Write a compacted index (base segment plus pending changes) to disk"""
+        path = path or self.path
+        os.makedirs(path, exist_ok=True)
+
+        doc_ids = sorted(self.docs)
+        numbers = {doc_id: number for number, doc_id in enumerate(doc_ids)}
+
+        # Map live base doc numbers to their position in the new segment
+        remap = np.array(
+            [numbers.get(doc_id, 0) for doc_id in self._base_ids], dtype=np.uint32
+        )
+        overlay_postings = {}
+        for doc_id, counts in self._overlay.items():
+            for term, tf in counts.items():
+                overlay_postings.setdefault(term, []).append((numbers[doc_id], tf))
+
+        terms = {}
+        segments = []
+        total = 0
+        for term in sorted(set(self._base_terms) | set(overlay_postings)):
+            base = self._base_postings_for(term).copy()
+            base['doc'] = remap[base['doc']]
+            entries = np.concatenate([
+                base, np.array(overlay_postings.get(term, []), dtype=POSTING_DTYPE)
+            ])
+            if not len(entries):
+                continue
+            entries.sort(order='doc')
+            terms[term] = [total, len(entries)]
+            segments.append(entries)
+            total += len(entries)
+
+        array = np.concatenate(segments) if segments else np.zeros(0, dtype=POSTING_DTYPE)
+        meta = {"version": INDEX_VERSION, "doc_ids": doc_ids, "docs": self.docs, "terms": terms}
+
+        # Write to temp files and swap in, so readers never see a half-written index
+        postings_path = os.path.join(path, 'postings.bin')
+        meta_path = os.path.join(path, 'meta.json')
+        array.tofile(postings_path + '.tmp')
+        with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(meta, f, separators=(',', ':'))
+        os.replace(postings_path + '.tmp', postings_path)
+        os.replace(meta_path + '.tmp', meta_path)
+
+        self.path = path
+        self.load(path)
+
+    def load(self, path):
+        """Load an index written by save(), memory-mapping the postings"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version: {meta.get('version')}")
+
+        postings_path = os.path.join(path, 'postings.bin')
+        if os.path.getsize(postings_path):
+            self._base_postings = np.memmap(postings_path, dtype=POSTING_DTYPE, mode='r')
+        else:
+            self._base_postings = np.zeros(0, dtype=POSTING_DTYPE)
+
+        self.path = path
+        self.docs = meta['docs']
+        self._base_ids = meta['doc_ids']
+        self._base_terms = {term: tuple(entry) for term, entry in meta['terms'].items()}
+        self._base_numbers = {doc_id: number for number, doc_id in enumerate(self._base_ids)}
+        self._base_live = np.ones(len(self._base_ids), dtype=bool)
+        self._base_lengths = np.array(
+            [self.docs[doc_id]['length'] for doc_id in self._base_ids], dtype=np.float64
+        )
+        self._overlay = {}
\ No newline at end of file
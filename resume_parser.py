@@ -1,264 +1,790 @@
-import google.generativeai as genai
-from pdfminer.high_level import extract_text
-from docx import Document
+import pandas as pd
 import os
-import json
+import asyncio
+import concurrent.futures
+import admission
+import extractors
+from analysis_cache import AnalysisCache
+from config import Config
+from document_store import get_store, resolve_text
+from json_stream import JSONSectionStream
+from llm_client import estimate_tokens, get_client
+from local_scorer import LocalScorer
+from market_service import MarketService, profile_from_analysis
+from metrics import metrics
+from response_schema import (
+    DecodeError, JobMatch, ResumeAnalysis, decode_json, decode_section, invalid_sections
+)
+from single_flight import SingleFlight
+from text_compactor import TextCompactor
+
+# JSON shape requested for each section of the analysis
+SECTION_SCHEMAS = {
+    "summary": """{
+    "brief": "A concise 2-3 sentence professional summary highlighting key strengths",
+    "years_of_experience": "Total years of experience as a number",
+    "ai_rating": {
+        "overall": "Score 0-100",
+        "skills_rating": "Score 0-100",
+        "experience_rating": "Score 0-100",
+        "education_rating": "Score 0-100"
+    }
+}""",
+    "skills": """{
+    "expertise_level": {
+        "expert": ["List of expert-level skills"],
+        "intermediate": ["List of intermediate-level skills"],
+        "beginner": ["List of beginner-level skills"]
+    }
+}""",
+    "achievements": """[
+    {
+        "title": "Achievement title",
+        "description": "Detailed achievement description",
+        "impact": "Quantifiable impact if available"
+    }
+]""",
+    "experience": """{
+    "total_years": "X years Y months",
+    "experiences": [
+        {
+            "title": "Job Title",
+            "company": "Company Name",
+            "duration": "Duration",
+            "responsibilities": ["Key responsibility 1", "Key responsibility 2"],
+            "key_achievements": ["Achievement 1", "Achievement 2"]
+        }
+    ]
+}""",
+    "education": """{
+    "education": [
+        {
+            "degree": "Degree Name",
+            "institution": "Institution Name",
+            "year": "Year",
+            "achievements": ["Academic achievement 1", "Academic achievement 2"]
+        }
+    ]
+}""",
+    "certifications": """[
+    {
+        "name": "Certification Name",
+        "issuer": "Issuing Organization",
+        "year": "Year"
+    }
+]""",
+    "market_insights": """{
+    "salary_range": {
+        "average": "Average salary for this profile",
+        "range": "Expected salary range"
+    },
+    "demand": {
+        "trend": "Current market trend",
+        "growth_rate": "Expected growth rate"
+    }
+}""",
+    "suggestions": """{
+    "resume_improvements": ["Specific suggestion 1", "Specific suggestion 2"],
+    "skill_improvements": ["Skill improvement 1", "Skill improvement 2"],
+    "career_growth": ["Career growth suggestion 1", "Career growth suggestion 2"]
+}""",
+}
+
+
+# Field descriptions for the job match response
+JOB_MATCH_SCHEMAS = {
+    "match_percentage": '"Overall match score 0-100"',
+    "skills_match": '"Skills match score 0-100"',
+    "experience_match": '"Experience match score 0-100"',
+    "missing_skills": '["Required skill 1 that\'s missing", "Required skill 2 that\'s missing"]',
+    "matching_skills": '["Matching skill 1", "Matching skill 2"]',
+    "recommendations": '["Specific recommendation 1", "Specific recommendation 2"]',
+}
+
+
+def format_schema(schemas):
+    """Join {name: schema} pairs into the body of a JSON object"""
+    return ',\n'.join(f'"{name}": {schema}' for name, schema in schemas.items())
+
+
+def build_analysis_prompt(sections):
+    """Assemble the full analysis prompt from per-section schemas"""
+    body = format_schema(sections)
+    return f"""
+            Analyze this resume and provide a detailed analysis in the following JSON format. Be specific, comprehensive and factual:
+            {{
+{body}
+            }}
+
+            Resume text to analyze:
+            """
+
 
 class ResumeParser:
-    def __init__(self, api_key):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    MODEL_NAME = 'gemini-pro'
+
+    # Market insights depend on the profile, not the resume, so they come from the shared market table
+    ANALYSIS_SECTIONS = [name for name in SECTION_SCHEMAS if name != 'market_insights']
+    ANALYSIS_PROMPT = build_analysis_prompt({name: SECTION_SCHEMAS[name] for name in ANALYSIS_SECTIONS})
+
+    # The job match schema has no braces of its own, so it is safe inside a format template
+    JOB_MATCH_PROMPT = """
+            Compare this resume and job description. Provide analysis in this exact JSON format:
+            {{
+""" + format_schema(JOB_MATCH_SCHEMAS) + """
+            }}
+
+            Resume:
+            {resume_text}
+
+            Job Description:
+            {job_description}
+            """
+
+    MULTI_JOB_MATCH_PROMPT = """
+            Compare this resume with each of the numbered job descriptions. Provide analysis in this exact JSON format, with one entry per job keyed by its number:
+            {{
+            "1": {{
+""" + format_schema(JOB_MATCH_SCHEMAS) + """
+            }}
+            }}
+
+            Resume:
+            {resume_text}
+
+            Job Descriptions:
+            {job_descriptions}
+            """
+
+    REASK_PROMPT = """
+            Some fields of your previous answer were missing or invalid: {fields}.
+            Provide only those fields in the following JSON format:
+            {{
+{schema}
+            }}
+
+            """
+
+    SECTION_PROMPT = """
+            Analyze this resume and provide only the "{section}" part of the analysis in the following JSON format. Be specific, comprehensive and factual:
+            {{
+"{section}": {schema}
+            }}
+
+            Resume text to analyze:
+            """
+
+    # Shared by every parser in the process, so identical requests from different sessions coalesce
+    _inflight = SingleFlight()
+
+    def __init__(self, api_key, cache=None, mode=None, model=None, documents=None, market=None):
+        self.model_name = self.MODEL_NAME
+        # Every analyzer shares this client, and with it the quota and connection
+        self.model = model or get_client(self.model_name, api_key)
+        if cache is None:
+            cache = AnalysisCache(Config.CACHE_PATH, Config.CACHE_TTL, Config.CACHE_MAX_ENTRIES)
+        self.cache = cache
+        # 'full' sends one prompt for everything, 'sectioned' one prompt per section
+        self.mode = mode or Config.ANALYSIS_MODE
+        self.compactor = TextCompactor(Config.RESUME_TOKEN_BUDGET)
+        # Extracted text is kept by content hash, so a document is only ever parsed once
+        self.documents = documents or get_store()
+        self.scorer = LocalScorer()
+        self.market = market or MarketService(self.model)
     
     def parse_file(self, uploaded_file):
         """Parse uploaded file content"""
+        return self.load_document(uploaded_file).text
+
+    def load_document(self, uploaded_file):
+        """Return the stored Document for an upload, extracting it only the first time it is seen"""
         file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-        
-        # Save the uploaded file temporarily
-        with open("temp_file" + file_extension, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
+
+        with metrics.span('parse_file') as span:
+            # Read straight from the upload buffer; nothing touches the filesystem
+            buffer = uploaded_file.getbuffer()
+            # Check the size before copying anything
+            admission.check_size(len(buffer))
+            data = bytes(buffer)
+            span.input_size = len(data)
+            document = self.documents.get_or_extract(data, file_extension, uploaded_file.name)
+            span.output_size = document.char_count
+        return document
+
+    @staticmethod
+    def parse_stream(stream, file_extension):
+        """Extract text from a binary file-like object, with the extractor for its extension or content"""
+        return extractors.extract(stream.read(), file_extension)
+
+    @staticmethod
+    def parse_path(file_path):
+        """Extract text from a document on disk"""
+        admission.check_path(file_path)
+        file_extension = os.path.splitext(file_path)[1].lower()
+
+        with open(file_path, 'rb') as f:
+            return ResumeParser.parse_stream(f, file_extension)
+
+    @staticmethod
+    def parse_pdf(source):
+        """Extract text from a PDF path or binary file-like object"""
+        return extractors.run(extractors.get_extractor('.pdf'), source)
+    
+    @staticmethod
+    def parse_docx(source):
+        """Extract text from a DOCX path or binary file-like object"""
+        return extractors.run(extractors.get_extractor('.docx'), source)
+
+    def compact_text(self, resume_text, job_desc=None):
+        """Compact resume text for prompting and report the estimated input tokens"""
+        with metrics.span('compact') as span:
+            compaction = self.compactor.compact(resolve_text(resume_text))
+            span.input_size = compaction.tokens_before
+            span.output_size = compaction.tokens_after
+        usage = {
+            "resume_tokens_before": compaction.tokens_before,
+            "resume_tokens_after": compaction.tokens_after,
+            "lines_removed": compaction.lines_removed,
+            "truncated": compaction.truncated,
+            "analysis_prompt_tokens": estimate_tokens(self.ANALYSIS_PROMPT + compaction.text),
+        }
+        if job_desc:
+            prompt, _ = self._job_match_prompt(compaction.text, job_desc)
+            usage["job_match_prompt_tokens"] = estimate_tokens(prompt)
+        return compaction.text, usage
+
+    def analyze_resume(self, uploaded_file, job_desc=None):
+        """Main analysis function; sync callers only, await analyze_resume_async inside an event loop"""
+        self._require_no_loop('analyze_resume')
+        return asyncio.run(self.analyze_resume_async(uploaded_file, job_desc))
+
+    async def analyze_resume_async(self, uploaded_file, job_desc=None):
+        """Parse the file and run the analysis without blocking the event loop"""
         try:
-            if file_extension == '.pdf':
-                text = self.parse_pdf("temp_file" + file_extension)
-            elif file_extension == '.docx':
-                text = self.parse_docx("temp_file" + file_extension)
+            # First parse the file
+            document = await asyncio.to_thread(self.load_document, uploaded_file)
+        except Exception as e:
+            print(f"Error occurred: {str(e)}")
+            return self._error_analysis(str(e))
+
+        return await self.analyze_text_async(document, job_desc)
+
+    def analyze_text(self, resume_text, job_desc=None):
+        """Analyze already extracted resume text; sync callers only, await analyze_text_async inside an event loop"""
+        self._require_no_loop('analyze_text')
+        return asyncio.run(self.analyze_text_async(resume_text, job_desc))
+
+    @staticmethod
+    def _require_no_loop(name):
+        # asyncio.run can't start a loop inside another, and blocking the caller's loop would stall it anyway
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        raise RuntimeError(f"{name}() can't be called from a running event loop; await {name}_async() instead")
+
+    async def analyze_text_async(self, resume_text, job_desc=None):
+        """Run the resume analysis and job match calls concurrently"""
+        try:
+            # Compaction is CPU-bound and can load a document from the store, so keep it off the loop
+            resume_text, token_usage = await asyncio.to_thread(self.compact_text, resume_text, job_desc)
+            run_analysis = self._run_sectioned if self.mode == 'sectioned' else self._run_analysis
+
+            if job_desc:
+                # Both calls only need the resume text, so start them together
+                analysis, job_match = await asyncio.gather(
+                    asyncio.to_thread(run_analysis, resume_text),
+                    asyncio.to_thread(self.analyze_job_match, resume_text, job_desc)
+                )
+                analysis['job_match'] = job_match
             else:
-                raise ValueError("Unsupported file format")
-            
-            # Remove temporary file
-            os.remove("temp_file" + file_extension)
-            return text
-            
+                analysis = await asyncio.to_thread(run_analysis, resume_text)
+
+            analysis['token_usage'] = token_usage
+            return analysis
+
         except Exception as e:
-            # Clean up temporary file in case of error
-            if os.path.exists("temp_file" + file_extension):
-                os.remove("temp_file" + file_extension)
-            raise e
-    
-    def parse_pdf(self, file_path):
-        """Extract text from PDF"""
+            print(f"Error occurred: {str(e)}")
+            # Return a structured error response
+            return self._error_analysis(str(e))
+
+    def _run_analysis(self, resume_text):
+        """Run the main analysis prompt, raising if the response can't be parsed"""
+        cache_key = AnalysisCache.make_key(
+            'analysis', resume_text, self.ANALYSIS_PROMPT, self.model_name
+        )
+        # Followers share the leader's dict, so each adds market insights to its own copy
+        analysis = dict(self._inflight.do(cache_key, self._fetch_analysis, resume_text, cache_key))
+        analysis['market_insights'] = self.market_insights(analysis)
+        return analysis
+
+    def _fetch_analysis(self, resume_text, cache_key):
+        analysis = self.cache.get(cache_key)
+        if analysis is not None:
+            return analysis
+
+        # Get the analysis from Gemini
+        response = self.model.generate_content(self.ANALYSIS_PROMPT + resume_text)
+        analysis, invalid = self._decode_analysis(response.text, resume_text)
+
+        self._cache_analysis(cache_key, analysis, invalid)
+        return analysis
+
+    def _cache_analysis(self, cache_key, analysis, invalid):
+        # Defaults stand in for sections that stayed invalid; a later request should ask again
+        if invalid:
+            print(f"Not caching analysis with invalid sections: {', '.join(invalid)}")
+        else:
+            self.cache.set(cache_key, analysis)
+
+    def _decode_analysis(self, response_text, resume_text):
+        """Decode and validate the analysis, re-asking only for sections that came back invalid
+
+        Returns (analysis, sections still invalid after the re-ask).
+        """
+        record, invalid = ResumeAnalysis.from_dict(self._decode(response_text, dict))
+        sections = [name for name in invalid_sections(invalid) if name in self.ANALYSIS_SECTIONS]
+        if sections:
+            record, invalid = self._reask(
+                ResumeAnalysis, record, invalid, {name: SECTION_SCHEMAS[name] for name in sections},
+                "Resume text to analyze:\n" + resume_text
+            )
+            sections = [name for name in invalid_sections(invalid) if name in self.ANALYSIS_SECTIONS]
+        analysis = record.to_dict()
+        # Not part of the prompt; filled in from the market table
+        del analysis['market_insights']
+        return analysis, sections
+
+    def _reask(self, record_cls, record, invalid, schemas, context):
+        """Ask the model again for just the given fields and merge them in; returns (record, invalid)"""
+        if not Config.REASK_INVALID_FIELDS:
+            return record, invalid
+
+        prompt = self.REASK_PROMPT.format(
+            fields=', '.join(schemas), schema=format_schema(schemas)
+        ) + context
         try:
-            text = extract_text(file_path)
-            return text
+            response = self.model.generate_content(prompt)
+            partial = self._decode(response.text, dict)
         except Exception as e:
-            raise Exception(f"Error parsing PDF: {str(e)}")
-    
-    def parse_docx(self, file_path):
-        """Extract text from DOCX"""
+            print(f"Error re-asking for {', '.join(schemas)}: {str(e)}")
+            return record, invalid
+
+        merged = record.to_dict()
+        if isinstance(partial, dict):
+            merged.update({name: partial[name] for name in schemas if name in partial})
+        return record_cls.from_dict(merged)
+
+    def _run_sectioned(self, resume_text):
+        """Run the sectioned analysis and collect it into the usual dict shape"""
+        return dict(self.iter_sections(resume_text))
+
+    def iter_sections(self, resume_text):
+        """Fire one prompt per section concurrently, yielding (section, data) as each finishes"""
+        sections = self.ANALYSIS_SECTIONS
+        results = {}
+        errors = {}
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(SECTION_SCHEMAS)) as executor:
+            futures = {
+                executor.submit(metrics.bind(self._run_resume_section), name, resume_text): name
+                for name in sections
+            }
+            pending = set(futures)
+            market_started = False
+
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    name = futures[future]
+                    try:
+                        data = future.result()
+                    except Exception as e:
+                        print(f"Error in section {name}: {str(e)}")
+                        errors[name] = str(e)
+                        data = self._error_analysis(str(e))[name]
+                    results[name] = data
+                    yield name, data
+
+                # Market insights depend on the profile (role, seniority, top skills), not on the resume
+                if not market_started and all(name in results for name in ('summary', 'experience', 'skills')):
+                    market_started = True
+                    future = executor.submit(metrics.bind(self.market_insights), dict(results))
+                    futures[future] = 'market_insights'
+                    pending.add(future)
+
+        if errors:
+            yield 'section_errors', errors
+
+    def _run_resume_section(self, section, resume_text):
+        prompt = self.SECTION_PROMPT.format(section=section, schema=SECTION_SCHEMAS[section])
+        cache_key = AnalysisCache.make_key('section', section, resume_text, prompt, self.model_name)
+        return self._run_section(section, prompt + resume_text, cache_key)
+
+    def market_insights(self, analysis):
+        """Market insights for the analyzed profile, shared by every resume with the same canonical profile"""
         try:
-            doc = Document(file_path)
-            text = '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-            return text
+            insights = self.market.profile_insights(profile_from_analysis(analysis))
         except Exception as e:
-            raise Exception(f"Error parsing DOCX: {str(e)}")
+            print(f"Error in market insights: {str(e)}")
+            return self._error_analysis(str(e))['market_insights']
+        value, _ = decode_section('market_insights', insights)
+        return value
 
-    def analyze_resume(self, uploaded_file, job_desc=None):
-        """Main analysis function"""
+    def _run_section(self, section, prompt, cache_key):
+        """Request one section, validating and retrying it on its own"""
+        return self._inflight.do(cache_key, self._fetch_section, section, prompt, cache_key)
+
+    def _fetch_section(self, section, prompt, cache_key):
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        data = None
+        error = None
+        for _ in range(Config.SECTION_RETRIES + 1):
+            try:
+                response = self.model.generate_content(prompt)
+                decoded = self._decode(response.text)
+            except Exception as e:
+                error = e
+                continue
+
+            raw = decoded.get(section, decoded) if isinstance(decoded, dict) else decoded
+            value, invalid = decode_section(section, raw)
+            if not invalid:
+                self.cache.set(cache_key, value)
+                return value
+            error = ValueError(f"invalid fields: {', '.join(invalid)}")
+            if section not in invalid:
+                # Right shape with some bad fields: better than nothing if retries run out
+                data = value
+
+        if data is None:
+            raise Exception(f"Could not get a valid {section} section: {str(error)}")
+
+        # Keep the best effort rather than dropping the section, but don't cache it
+        print(f"Using partially valid {section} section: {str(error)}")
+        return data
+
+    def analyze_resume_stream(self, uploaded_file, job_desc=None):
+        """Yield (section, data) pairs as each part of the analysis arrives"""
         try:
-            # First parse the file
             resume_text = self.parse_file(uploaded_file)
-            
-            # Prepare the analysis prompt
-            prompt = """
-            Analyze this resume and provide a detailed analysis in the following JSON format. Be specific, comprehensive and factual:
-            {
-                "summary": {
-                    "brief": "A concise 2-3 sentence professional summary highlighting key strengths",
-                    "years_of_experience": "Total years of experience as a number",
-                    "ai_rating": {
-                        "overall": "Score 0-100",
-                        "skills_rating": "Score 0-100",
-                        "experience_rating": "Score 0-100",
-                        "education_rating": "Score 0-100"
-                    }
-                },
-                "skills": {
-                    "expertise_level": {
-                        "expert": ["List of expert-level skills"],
-                        "intermediate": ["List of intermediate-level skills"],
-                        "beginner": ["List of beginner-level skills"]
-                    }
-                },
-                "achievements": [
-                    {
-                        "title": "Achievement title",
-                        "description": "Detailed achievement description",
-                        "impact": "Quantifiable impact if available"
-                    }
-                ],
-                "experience": {
-                    "total_years": "X years Y months",
-                    "experiences": [
-                        {
-                            "title": "Job Title",
-                            "company": "Company Name",
-                            "duration": "Duration",
-                            "responsibilities": ["Key responsibility 1", "Key responsibility 2"],
-                            "key_achievements": ["Achievement 1", "Achievement 2"]
-                        }
-                    ]
-                },
-                "education": {
-                    "education": [
-                        {
-                            "degree": "Degree Name",
-                            "institution": "Institution Name",
-                            "year": "Year",
-                            "achievements": ["Academic achievement 1", "Academic achievement 2"]
-                        }
-                    ]
-                },
-                "certifications": [
-                    {
-                        "name": "Certification Name",
-                        "issuer": "Issuing Organization",
-                        "year": "Year"
-                    }
-                ],
-                "market_insights": {
-                    "salary_range": {
-                        "average": "Average salary for this profile",
-                        "range": "Expected salary range"
-                    },
-                    "demand": {
-                        "trend": "Current market trend",
-                        "growth_rate": "Expected growth rate"
-                    }
-                },
-                "suggestions": {
-                    "resume_improvements": ["Specific suggestion 1", "Specific suggestion 2"],
-                    "skill_improvements": ["Skill improvement 1", "Skill improvement 2"],
-                    "career_growth": ["Career growth suggestion 1", "Career growth suggestion 2"]
-                }
-            }
+        except Exception as e:
+            print(f"Error occurred: {str(e)}")
+            yield 'error', str(e)
+            return
 
-            Resume text to analyze:
-            """ + resume_text
+        yield from self.analyze_text_stream(resume_text, job_desc)
 
-            # Get the analysis from Gemini
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Parse the response
-            try:
-                # First try to parse the response directly
-                analysis = json.loads(response_text)
-            except json.JSONDecodeError:
-                # If direct parsing fails, try to find JSON content
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                
-                if start_idx != -1 and end_idx != 0:
-                    json_str = response_text[start_idx:end_idx]
-                    analysis = json.loads(json_str)
+    def analyze_text_stream(self, resume_text, job_desc=None):
+        """Stream the analysis, emitting each top-level section as soon as its JSON is complete"""
+        resume_text, token_usage = self.compact_text(resume_text, job_desc)
+        yield 'token_usage', token_usage
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        # The job match doesn't depend on the analysis, so run it alongside the stream
+        job_match = executor.submit(
+            metrics.bind(self.analyze_job_match), resume_text, job_desc
+        ) if job_desc else None
+
+        try:
+            cache_key = AnalysisCache.make_key(
+                'analysis', resume_text, self.ANALYSIS_PROMPT, self.model_name
+            )
+            analysis = self.cache.get(cache_key)
+
+            if self.mode == 'sectioned':
+                yield from self.iter_sections(resume_text)
+            else:
+                if analysis is not None:
+                    sections = analysis.items()
                 else:
-                    raise Exception("Could not parse the analysis response")
+                    call, leader = self._inflight.claim(cache_key)
+                    # A follower waits for the resume that is already being analyzed instead
+                    sections = self._stream_analysis(resume_text, cache_key, call) if leader else call.wait().items()
 
-            # If job description is provided, add job match analysis
-            if job_desc:
-                job_match = self.analyze_job_match(resume_text, job_desc)
-                analysis['job_match'] = job_match
+                analysis = {}
+                for section, data in sections:
+                    if section not in self.ANALYSIS_SECTIONS:
+                        continue
+                    analysis[section] = data
+                    yield section, data
+                yield 'market_insights', self.market_insights(analysis)
 
-            return analysis
+            if job_match is not None:
+                yield 'job_match', job_match.result()
 
         except Exception as e:
             print(f"Error occurred: {str(e)}")
-            # Return a structured error response
-            return {
-                "error": str(e),
-                "summary": {
-                    "brief": "Error analyzing resume",
-                    "years_of_experience": "0",
-                    "ai_rating": {
-                        "overall": "0",
-                        "skills_rating": "0",
-                        "experience_rating": "0",
-                        "education_rating": "0"
-                    }
-                },
-                "skills": {
-                    "expertise_level": {
-                        "expert": [],
-                        "intermediate": [],
-                        "beginner": []
-                    }
-                },
-                "achievements": [],
-                "experience": {
-                    "total_years": "0",
-                    "experiences": []
-                },
-                "education": {
-                    "education": []
-                },
-                "certifications": [],
-                "market_insights": {
-                    "salary_range": {
-                        "average": "Not available",
-                        "range": "Not available"
-                    },
-                    "demand": {
-                        "trend": "Not available",
-                        "growth_rate": "Not available"
-                    }
+            yield 'error', str(e)
+        finally:
+            executor.shutdown(wait=False)
+
+    def _stream_analysis(self, resume_text, cache_key, call):
+        """Stream the full analysis prompt as the leader of an in-flight call"""
+        try:
+            stream = JSONSectionStream()
+            response = self.model.generate_content(self.ANALYSIS_PROMPT + resume_text, stream=True)
+            try:
+                for chunk in response:
+                    # The model may volunteer market insights of its own; the table's are yielded instead
+                    for section, data in stream.feed(chunk.text):
+                        if section in self.ANALYSIS_SECTIONS:
+                            yield section, data
+            finally:
+                # The shared client's streams free their LLM slot on close; raw model streams have nothing to close
+                close = getattr(response, 'close', None)
+                if close is not None:
+                    close()
+
+            try:
+                analysis, invalid = self._decode_analysis(stream.text, resume_text)
+            except DecodeError:
+                # Only the sections that streamed whole, none of them validated
+                analysis = {
+                    section: data for section, data in stream.sections.items() if section in self.ANALYSIS_SECTIONS
+                }
+                if not analysis:
+                    raise
+                invalid = list(analysis)
+
+            # Sections that were missing, malformed or corrected during validation
+            for section, data in analysis.items():
+                if stream.sections.get(section) != data:
+                    yield section, data
+
+            self._cache_analysis(cache_key, analysis, invalid)
+            call.resolve(analysis)
+        except Exception as e:
+            call.reject(e)
+            raise
+        finally:
+            self._inflight.release(cache_key, call)
+
+    @staticmethod
+    def _decode(response_text, expect=None):
+        with metrics.span('decode_response') as span:
+            span.input_size = len(response_text)
+            return decode_json(response_text, expect)
+
+    @staticmethod
+    def _error_analysis(message):
+        return {
+            "error": message,
+            "summary": {
+                "brief": "Error analyzing resume",
+                "years_of_experience": "0",
+                "ai_rating": {
+                    "overall": "0",
+                    "skills_rating": "0",
+                    "experience_rating": "0",
+                    "education_rating": "0"
+                }
+            },
+            "skills": {
+                "expertise_level": {
+                    "expert": [],
+                    "intermediate": [],
+                    "beginner": []
+                }
+            },
+            "achievements": [],
+            "experience": {
+                "total_years": "0",
+                "experiences": []
+            },
+            "education": {
+                "education": []
+            },
+            "certifications": [],
+            "market_insights": {
+                "salary_range": {
+                    "average": "Not available",
+                    "range": "Not available"
                 },
-                "suggestions": {
-                    "resume_improvements": [],
-                    "skill_improvements": [],
-                    "career_growth": []
+                "demand": {
+                    "trend": "Not available",
+                    "growth_rate": "Not available"
                 }
+            },
+            "suggestions": {
+                "resume_improvements": [],
+                "skill_improvements": [],
+                "career_growth": []
             }
+        }
+
+    def _job_match_prompt(self, resume_text, job_description):
+        with metrics.span('build_prompt') as span:
+            # Compaction is idempotent, so text compacted upstream passes through unchanged
+            resume_text = self.compactor.compact(resume_text).text
+            job_description = self.compactor.compact(job_description, Config.JOB_DESCRIPTION_TOKEN_BUDGET).text
+            prompt = self.JOB_MATCH_PROMPT.format(resume_text=resume_text, job_description=job_description)
+            span.output_size = len(prompt)
+        return prompt, f"Resume:\n{resume_text}\n\nJob Description:\n{job_description}"
 
     def analyze_job_match(self, resume_text, job_description):
         """Analyze job match and return structured data"""
         try:
-            prompt = f"""
-            Compare this resume and job description. Provide analysis in this exact JSON format:
-            {{
-                "match_percentage": "Overall match score 0-100",
-                "skills_match": "Skills match score 0-100",
-                "experience_match": "Experience match score 0-100",
-                "missing_skills": ["Required skill 1 that's missing", "Required skill 2 that's missing"],
-                "matching_skills": ["Matching skill 1", "Matching skill 2"],
-                "recommendations": ["Specific recommendation 1", "Specific recommendation 2"]
-            }}
-
-            Resume:
-            {resume_text}
-
-            Job Description:
-            {job_description}
-            """
-            
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            try:
-                return json.loads(response_text)
-            except json.JSONDecodeError:
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                
-                if start_idx != -1 and end_idx != 0:
-                    json_str = response_text[start_idx:end_idx]
-                    return json.loads(json_str)
-                else:
-                    return {
-                        "match_percentage": "0",
-                        "skills_match": "0",
-                        "experience_match": "0",
-                        "missing_skills": ["Could not analyze skills match"],
-                        "matching_skills": [],
-                        "recommendations": ["Could not generate recommendations"]
-                    }
+            resume_text = resolve_text(resume_text)
+            cache_key = self._job_match_key(resume_text, job_description)
+            return self._inflight.do(cache_key, self._fetch_job_match, resume_text, job_description, cache_key)
 
         except Exception as e:
             print(f"Error in analyze_job_match: {str(e)}")
+            return self._error_job_match()
+
+    @staticmethod
+    def _error_job_match():
+        return {
+            "match_percentage": "0",
+            "skills_match": "0",
+            "experience_match": "0",
+            "missing_skills": [],
+            "matching_skills": [],
+            "recommendations": []
+        }
+
+    def _fetch_job_match(self, resume_text, job_description, cache_key):
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        prompt, context = self._job_match_prompt(resume_text, job_description)
+        response = self.model.generate_content(prompt)
+
+        try:
+            data = self._decode(response.text, dict)
+        except DecodeError:
             return {
                 "match_percentage": "0",
                 "skills_match": "0",
                 "experience_match": "0",
-                "missing_skills": [],
+                "missing_skills": ["Could not analyze skills match"],
                 "matching_skills": [],
-                "recommendations": []
-            }
\ No newline at end of file
+                "recommendations": ["Could not generate recommendations"]
+            }
+
+        record, invalid = JobMatch.from_dict(data)
+        fields = invalid_sections(invalid)
+        if fields:
+            record, invalid = self._reask(
+                JobMatch, record, invalid, {name: JOB_MATCH_SCHEMAS[name] for name in fields}, context
+            )
+            fields = invalid_sections(invalid)
+        job_match = record.to_dict()
+
+        # Defaults stand in for fields that stayed invalid; a later request should ask again
+        if fields:
+            print(f"Not caching job match with invalid fields: {', '.join(fields)}")
+        else:
+            self.cache.set(cache_key, job_match)
+        return job_match
+
+    def _job_match_key(self, resume_text, job_description):
+        # Batched and single-job matches share cache entries
+        return AnalysisCache.make_key(
+            'job_match', resume_text, job_description, self.JOB_MATCH_PROMPT, self.model_name
+        )
+
+    def analyze_job_matches(self, resume_text, job_descriptions, top_k=Config.JOB_MATCH_TOP_K,
+                            min_score=Config.JOB_MATCH_MIN_SCORE, skills=None):
+        """Rank a resume against many {name: text} jobs and return a match table, best first
+
+        Jobs are pre-scored locally and only those passing top_k/min_score are sent to the model.
+        """
+        resume_text = resolve_text(resume_text)
+        ranked = self.scorer.score_jobs(resume_text, job_descriptions, skills)
+        shortlisted = self.scorer.select(ranked, top_k, min_score).index
+        matches = self.match_jobs(resume_text, {name: job_descriptions[name] for name in shortlisted})
+
+        rows = []
+        for name, local_score in ranked['score'].items():
+            row = {"job": name, "local_score": float(local_score), "shortlisted": name in matches}
+            row.update(matches.get(name) or dict.fromkeys(JOB_MATCH_SCHEMAS))
+            rows.append(row)
+
+        table = pd.DataFrame(rows, columns=['job', 'local_score', 'shortlisted'] + list(JOB_MATCH_SCHEMAS))
+        for column in ('match_percentage', 'skills_match', 'experience_match'):
+            table[column] = pd.to_numeric(table[column], errors='coerce')
+        return table.sort_values(
+            ['shortlisted', 'match_percentage', 'local_score'], ascending=False
+        ).set_index('job')
+
+    def match_jobs(self, resume_text, job_descriptions):
+        """Match a resume against {name: text} jobs, packing them into as few prompts as fit the budget"""
+        resume_text = resolve_text(resume_text)
+        matches = {}
+        pending = {}
+        for name, job_description in job_descriptions.items():
+            cached = self.cache.get(self._job_match_key(resume_text, job_description))
+            if cached is not None:
+                matches[name] = cached
+            else:
+                pending[name] = job_description
+        if not pending:
+            return matches
+
+        compacted = self.compactor.compact(resume_text).text
+        batches = self._pack_job_batches(compacted, pending)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(batches)) as executor:
+            futures = [
+                executor.submit(metrics.bind(self._run_job_batch), resume_text, compacted, batch, pending)
+                for batch in batches
+            ]
+            for future in futures:
+                matches.update(future.result())
+        return matches
+
+    def _pack_job_batches(self, resume_text, job_descriptions):
+        """Split jobs into {name: compacted text} batches that keep each prompt within budget"""
+        base_tokens = estimate_tokens(
+            self.MULTI_JOB_MATCH_PROMPT.format(resume_text=resume_text, job_descriptions='')
+        )
+        batches = []
+        batch, used = {}, base_tokens
+        for name, job_description in job_descriptions.items():
+            text = self.compactor.compact(job_description, Config.JOB_DESCRIPTION_TOKEN_BUDGET).text
+            # Allow for the "[Job n]" header
+            tokens = estimate_tokens(text) + 4
+            if batch and (used + tokens > Config.JOB_MATCH_BATCH_TOKEN_BUDGET
+                          or len(batch) >= Config.JOB_MATCH_BATCH_SIZE):
+                batches.append(batch)
+                batch, used = {}, base_tokens
+            batch[name] = text
+            used += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _run_job_batch(self, resume_text, compacted, batch, job_descriptions):
+        names = list(batch)
+        with metrics.span('build_prompt') as span:
+            listing = '\n\n'.join(f"[Job {number}]\n{batch[name]}" for number, name in enumerate(names, 1))
+            prompt = self.MULTI_JOB_MATCH_PROMPT.format(resume_text=compacted, job_descriptions=listing)
+            span.output_size = len(prompt)
+
+        try:
+            response = self.model.generate_content(prompt)
+            data = self._decode(response.text, dict)
+        except Exception as e:
+            # Usually quota or network trouble after the client's own retries; a prompt per job would only
+            # add to it, so these jobs score zero (uncached) this time
+            print(f"Error in batched job match: {str(e)}")
+            return {name: self._error_job_match() for name in names}
+
+        matches = {}
+        for number, name in enumerate(names, 1):
+            entry = data.get(str(number))
+            record, invalid = JobMatch.from_dict(entry)
+            if invalid:
+                # Anything the batch got wrong gets its own prompt, which re-asks as usual
+                matches[name] = self.analyze_job_match(resume_text, job_descriptions[name])
+                continue
+            matches[name] = record.to_dict()
+            self.cache.set(self._job_match_key(resume_text, job_descriptions[name]), matches[name])
+        return matches
\ No newline at end of file
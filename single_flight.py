@@ -0,0 +1,78 @@
+import copy
+import threading
+
+from metrics import metrics
+
+
+class Call:
+    """One in-flight computation that any number of threads can wait on"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+
+    def resolve(self, value):
+        # Snapshot it so the leader can go on to modify its own copy
+        self._value = copy.deepcopy(value)
+        self._done.set()
+
+    def reject(self, error):
+        self._error = error
+        self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self):
+        """Block until the leader finishes; followers get their own copy of the result"""
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return copy.deepcopy(self._value)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key):
+        """Return (call, leader); the leader must finish the call and then release it"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                metrics.incr('coalesced_requests_total')
+                return call, False
+            call = self._calls[key] = Call()
+            return call, True
+
+    def release(self, key, call):
+        """Retire the leader's call, failing it for any waiters if it never finished"""
+        if not call.done:
+            call.reject(RuntimeError("The shared request was abandoned before it finished"))
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once for concurrent callers sharing key and hand every caller the result"""
+        call, leader = self.claim(key)
+        if not leader:
+            return call.wait()
+
+        try:
+            value = fn(*args, **kwargs)
+        except Exception as e:
+            call.reject(e)
+            raise
+        else:
+            call.resolve(value)
+            return value
+        finally:
+            self.release(key, call)
\ No newline at end of file
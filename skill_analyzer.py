@@ -1,32 +1,54 @@
+import json
+
+from analysis_cache import AnalysisCache
+from document_store import resolve_text
+from llm_client import get_client
+from market_service import MarketService
+from metrics import instrument
+from response_schema import decode_json
+from single_flight import SingleFlight
+from skill_taxonomy import get_taxonomy
+
 class SkillAnalyzer:
-    def __init__(self, model):
-        self.model = model
+    _inflight = SingleFlight()
+
+    def __init__(self, model=None, taxonomy=None, market=None):
+        self.model = model or get_client()
+        self.taxonomy = taxonomy or get_taxonomy()
+        self.market = market or MarketService(self.model)
     
+    @instrument('skill_analyzer.extract_skills')
     def extract_skills(self, text):
-        """Extract and categorize skills"""
+        """Extract and categorize skills locally, asking the model only about ambiguous terms"""
+        extraction = self.taxonomy.extract(resolve_text(text))
+        skills = {category: list(names) for category, names in extraction.categories.items()}
+        if extraction.ambiguous:
+            key = AnalysisCache.make_key(
+                'resolve_skills', json.dumps(extraction.ambiguous, sort_keys=True), self.taxonomy.version
+            )
+            for name in self._inflight.do(key, self._resolve_ambiguous, extraction.ambiguous):
+                skills[self.taxonomy.category(name)].append(name)
+        return skills
+
+    def _resolve_ambiguous(self, ambiguous):
+        """Ask which ambiguous terms are used as skills; only the lines they appear on are sent"""
+        lines = '\n'.join(f'- "{name}" in: {line}' for name, line in ambiguous.items())
         prompt = f"""
-        Extract and categorize skills from this text:
-        {text}
-        
-        Categorize into:
-        1. Technical Skills
-        2. Soft Skills
-        3. Domain Knowledge
-        4. Tools & Technologies
+        For each term below, decide whether it refers to a professional skill, technology or tool in the given line.
+        {lines}
+
+        Return only a JSON list of the terms that are skills, e.g. ["Go"].
         """
-        response = self.model.generate_content(prompt)
-        return response.text
+        try:
+            response = self.model.generate_content(prompt)
+            names = decode_json(response.text, list)
+        except Exception as e:
+            print(f"Error resolving ambiguous skills: {str(e)}")
+            return []
+        return [name for name in ambiguous if name in names]
     
+    @instrument('skill_analyzer.analyze_skill_market_demand')
     def analyze_skill_market_demand(self, skills):
-        """Analyze market demand for skills"""
-        prompt = f"""
-        Analyze market demand for these skills:
-        {skills}
-        
-        Provide:
-        1. Current market demand
-        2. Future growth potential
-        3. Industry preferences
-        """
-        response = self.model.generate_content(prompt)
-        return response.text
\ No newline at end of file
+        """Analyze market demand for skills (text, a list, or extract_skills output)"""
+        # Demand is memoized per canonical skill, so only skills nobody asked about recently cost a call
+        return self.market.skill_demand(self.taxonomy.normalize_skills(skills))
\ No newline at end of file
@@ -0,0 +1,189 @@
+import json
+import re
+import threading
+from collections import deque, namedtuple
+
+from config import Config
+
+SkillMatch = namedtuple('SkillMatch', ['name', 'start', 'end', 'ambiguous'])
+SkillExtraction = namedtuple('SkillExtraction', ['categories', 'ambiguous'])
+
+_SPACES = re.compile(r'[ \t\xa0]+')
+# Characters that separate the items of a skills list
+_LIST_SEPARATORS = re.compile(r'[,;|/•·]')
+
+
+class SkillTaxonomy:
+    """Versioned skill taxonomy compiled into an Aho-Corasick automaton over every name and alias"""
+
+    def __init__(self, data):
+        self.version = str(data['version'])
+        self.categories = list(data['categories'])
+        # canonical name -> category, and lowercase pattern -> (canonical name, ambiguous)
+        self._skills = {}
+        self._patterns = {}
+
+        for category, entries in data['skills'].items():
+            if category not in self.categories:
+                raise ValueError(f"Unknown skill category: {category}")
+            for entry in entries:
+                name = entry['name']
+                ambiguous = {self._normalize(alias) for alias in entry.get('ambiguous', [])}
+                self._skills[name] = category
+                for pattern in [name] + entry.get('aliases', []):
+                    key = self._normalize(pattern)
+                    if key in self._patterns and self._patterns[key][0] != name:
+                        raise ValueError(
+                            f"Skill alias '{pattern}' is used by both {self._patterns[key][0]} and {name}"
+                        )
+                    self._patterns[key] = (name, key in ambiguous)
+
+        self._build()
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or Config.SKILL_TAXONOMY_PATH, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    @staticmethod
+    def _normalize(text):
+        return _SPACES.sub(' ', str(text).strip().lower())
+
+    @staticmethod
+    def _fold(text):
+        folded = text.lower()
+        if len(folded) != len(text):
+            # A few characters lowercase to more than one; keep offsets aligned with the original
+            folded = ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+        return folded
+
+    def _build(self):
+        goto, fail, output = [{}], [0], [[]]
+        for pattern in self._patterns:
+            state = 0
+            for char in pattern:
+                if char not in goto[state]:
+                    goto.append({})
+                    fail.append(0)
+                    output.append([])
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            output[state].append(pattern)
+
+        # Breadth-first, so every failure link points at an already finished shallower state
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in goto[state].items():
+                queue.append(child)
+                link = fail[state]
+                while link and char not in goto[link]:
+                    link = fail[link]
+                fail[child] = goto[link].get(char, 0)
+                output[child] = output[child] + output[fail[child]]
+
+        self._goto, self._fail, self._output = goto, fail, output
+
+    def _scan(self, text):
+        """Return the whitespace-normalized text and its leftmost-longest skill matches"""
+        text = _SPACES.sub(' ', text or '')
+        folded = self._fold(text)
+        goto, fail, output = self._goto, self._fail, self._output
+
+        candidates = []
+        state = 0
+        for end, char in enumerate(folded, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in output[state]:
+                start = end - len(pattern)
+                # Whole words only, so "java" doesn't match inside "javascript"
+                if (start == 0 or not folded[start - 1].isalnum()) and \
+                        (end == len(folded) or not folded[end].isalnum()):
+                    candidates.append((start, end, pattern))
+
+        matches = []
+        covered = 0
+        for start, end, pattern in sorted(candidates, key=lambda c: (c[0], -c[1])):
+            if start >= covered:
+                name, ambiguous = self._patterns[pattern]
+                matches.append(SkillMatch(name, start, end, ambiguous))
+                covered = end
+        return text, matches
+
+    def find(self, text):
+        """Every skill mention in text, as non-overlapping SkillMatch tuples in one linear scan"""
+        return self._scan(text)[1]
+
+    def extract(self, text):
+        """Categorized skills found in text, plus ambiguous mentions with the line they appear on"""
+        text, matches = self._scan(text)
+        # Lines with at least one unambiguous skill, for judging the ambiguous ones
+        skill_lines = {self._line_bounds(text, match)[0] for match in matches if not match.ambiguous}
+        confirmed = {}
+        ambiguous = {}
+        for match in matches:
+            if match.ambiguous and not self._in_skill_list(text, match, skill_lines):
+                ambiguous.setdefault(match.name, self._line(text, match))
+            else:
+                # A dict keeps the skills in order of first mention
+                confirmed.setdefault(match.name, None)
+
+        categories = {category: [] for category in self.categories}
+        for name in confirmed:
+            categories[self._skills[name]].append(name)
+        return SkillExtraction(
+            categories, {name: line for name, line in ambiguous.items() if name not in confirmed}
+        )
+
+    def skills(self, text):
+        """Set of canonical skills confidently found in text"""
+        extraction = self.extract(text)
+        return {name for names in extraction.categories.values() for name in names}
+
+    def normalize_skills(self, skills):
+        """Canonical names, in order and without repeats, from text, a list or a {category: [skills]} dict"""
+        if isinstance(skills, dict):
+            skills = [name for names in skills.values() for name in names]
+        elif isinstance(skills, str):
+            found = [name for names in self.extract(skills).categories.values() for name in names]
+            skills = found or _LIST_SEPARATORS.split(skills.replace('\n', ','))
+        names = (self.canonical(skill) or _SPACES.sub(' ', str(skill).strip()) for skill in skills)
+        return list(dict.fromkeys(name for name in names if name))
+
+    def canonical(self, skill):
+        """Canonical name for a skill name or alias, or None if it isn't in the taxonomy"""
+        entry = self._patterns.get(self._normalize(skill))
+        return entry[0] if entry else None
+
+    def category(self, skill):
+        return self._skills.get(self.canonical(skill))
+
+    @staticmethod
+    def _line_bounds(text, match):
+        start = text.rfind('\n', 0, match.start) + 1
+        end = text.find('\n', match.end)
+        return start, end if end != -1 else len(text)
+
+    def _line(self, text, match):
+        start, end = self._line_bounds(text, match)
+        return text[start:end].strip()
+
+    def _in_skill_list(self, text, match, skill_lines):
+        """An ambiguous term listed alongside other skills is taken to be a skill too"""
+        start, end = self._line_bounds(text, match)
+        return start in skill_lines and _LIST_SEPARATORS.search(text, start, end) is not None
+
+
+_taxonomies = {}
+_taxonomies_lock = threading.Lock()
+
+
+def get_taxonomy(path=None):
+    """Return the process-wide taxonomy for a path, compiling it on first use"""
+    path = path or Config.SKILL_TAXONOMY_PATH
+    with _taxonomies_lock:
+        if path not in _taxonomies:
+            _taxonomies[path] = SkillTaxonomy.load(path)
+        return _taxonomies[path]
\ No newline at end of file
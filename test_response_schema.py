@@ -0,0 +1,28 @@
+import pytest
+
+from response_schema import DecodeError, decode_json
+
+
+def test_decode_json_skips_a_bracket_in_prose_that_does_not_parse():
+    assert decode_json('Here is the analysis [JSON]: {"a": 1}') == {"a": 1}
+
+
+def test_decode_json_skips_a_bracketed_aside_before_the_object():
+    assert decode_json('The result (see [1]) {"a":1}') == {"a": 1}
+    assert decode_json('The result (see [1]) {"a":1}', dict) == {"a": 1}
+
+
+def test_decode_json_reads_lists():
+    assert decode_json('Sure: ["Go", "Rust"]', list) == ["Go", "Rust"]
+    assert decode_json('[{"a": 1}]') == [{"a": 1}]
+
+
+def test_decode_json_repairs_fences_and_trailing_commas():
+    assert decode_json('```json\n{"a": [1, 2,],}\n```') == {"a": [1, 2]}
+
+
+def test_decode_json_without_json():
+    with pytest.raises(DecodeError):
+        decode_json('no json here')
+    with pytest.raises(DecodeError):
+        decode_json('["Go"]', dict)
\ No newline at end of file
@@ -0,0 +1,23 @@
+from utils import Utils
+
+
+def test_parse_years_reads_years():
+    assert Utils.parse_years('5') == 5.0
+    assert Utils.parse_years('5+ years') == 5.0
+    assert Utils.parse_years(7) == 7.0
+
+
+def test_parse_years_reads_bare_months_as_a_fraction_of_a_year():
+    assert Utils.parse_years('18 months') == 1.5
+    assert Utils.parse_years('8 months') == 0.67
+    assert Utils.seniority_band(Utils.parse_years('8 months')) == 'junior'
+
+
+def test_parse_years_adds_months_to_years():
+    assert Utils.parse_years('1 year 6 months') == 1.5
+    assert Utils.parse_years('3 years, 6 months') == 3.5
+
+
+def test_parse_years_without_a_number():
+    assert Utils.parse_years(None) is None
+    assert Utils.parse_years('n/a') is None
\ No newline at end of file
@@ -0,0 +1,174 @@
+import re
+import unicodedata
+from collections import Counter, namedtuple
+
+from llm_client import estimate_tokens
+
+CompactionResult = namedtuple(
+    'CompactionResult', ['text', 'tokens_before', 'tokens_after', 'lines_removed', 'truncated']
+)
+
+# Lower numbers are kept first when a resume has to be cut to fit the budget
+SECTION_PRIORITIES = {
+    'header': 1,
+    'summary': 1,
+    'experience': 1,
+    'skills': 1,
+    'education': 2,
+    'certifications': 2,
+    'projects': 3,
+    'awards': 3,
+    'other': 4,
+    'publications': 4,
+    'volunteering': 4,
+    'languages': 4,
+    'interests': 5,
+    'references': 6,
+}
+
+SECTION_HEADINGS = {
+    'summary': ['summary', 'profile', 'professional summary', 'objective', 'about me', 'career objective'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment',
+                   'employment history', 'work history', 'career history'],
+    'skills': ['skills', 'technical skills', 'core competencies', 'competencies', 'technologies',
+               'tools', 'key skills'],
+    'education': ['education', 'academic background', 'qualifications', 'academic qualifications'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'licenses and certifications'],
+    'projects': ['projects', 'personal projects', 'key projects'],
+    'awards': ['awards', 'honors', 'achievements', 'accomplishments'],
+    'publications': ['publications', 'research', 'patents'],
+    'volunteering': ['volunteering', 'volunteer experience', 'community'],
+    'languages': ['languages'],
+    'interests': ['interests', 'hobbies', 'hobbies and interests'],
+    'references': ['references', 'referees'],
+}
+
+_HEADING_LOOKUP = {
+    heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings
+}
+_PAGE_NUMBER = re.compile(r'^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$', re.IGNORECASE)
+_BOILERPLATE = re.compile(
+    r'^(curriculum vitae|resume|résumé|references (are )?available (up)?on request\.?|'
+    r'confidential|this document is confidential.*)$',
+    re.IGNORECASE
+)
+
+
+class TextCompactor:
+    """Shrink extracted resume text before it goes into a prompt"""
+
+    # Shorter lines (headings, bullets, dates) legitimately repeat
+    MIN_DEDUPE_LENGTH = 30
+
+    def __init__(self, token_budget=None):
+        self.token_budget = token_budget
+
+    def compact(self, text, token_budget=None):
+        """Normalize, deduplicate and trim text to the token budget"""
+        budget = token_budget or self.token_budget
+        tokens_before = estimate_tokens(text)
+
+        pages = [self._normalize(page) for page in (text or '').split('\f')]
+        repeated = self._repeated_lines(pages)
+
+        lines = []
+        seen = set()
+        removed = 0
+        for page in pages:
+            for line in page:
+                key = self._line_key(line)
+                # Running headers often carry a page number, so match them with digits masked
+                if self._mask_digits(key) in repeated:
+                    key = self._mask_digits(key)
+                elif len(line) < self.MIN_DEDUPE_LENGTH:
+                    key = None
+                if _PAGE_NUMBER.match(line) or _BOILERPLATE.match(line) or (key and key in seen):
+                    removed += 1
+                    continue
+                if key:
+                    seen.add(key)
+                lines.append(line)
+
+        truncated = False
+        if budget and estimate_tokens('\n'.join(lines)) > budget:
+            lines, truncated = self._fit_sections(lines, budget)
+
+        compacted = '\n'.join(lines)
+        return CompactionResult(compacted, tokens_before, estimate_tokens(compacted), removed, truncated)
+
+    @staticmethod
+    def _normalize(page):
+        page = unicodedata.normalize('NFKC', page)
+        lines = []
+        for line in page.splitlines():
+            line = re.sub(r'[ \t ]+', ' ', line).strip()
+            if line:
+                lines.append(line)
+        return lines
+
+    @staticmethod
+    def _line_key(line):
+        return re.sub(r'\W+', ' ', line.lower()).strip()
+
+    @staticmethod
+    def _mask_digits(key):
+        return re.sub(r'\d+', '#', key)
+
+    def _repeated_lines(self, pages):
+        """Short lines found on most pages are running headers or footers; only the first is kept"""
+        if len(pages) < 3:
+            return set()
+
+        counts = Counter()
+        for page in pages:
+            edges = page[:2] + page[-2:]
+            counts.update({
+                self._mask_digits(self._line_key(line))
+                for line in edges if len(line) < 80 and self._line_key(line) not in _HEADING_LOOKUP
+            })
+
+        threshold = max(2, len(pages) // 2)
+        return {key for key, count in counts.items() if count >= threshold}
+
+    @staticmethod
+    def split_sections(lines):
+        """Group lines under the resume section heading they fall beneath"""
+        sections = [['header', []]]
+        for line in lines:
+            heading = re.sub(r'[^a-z ]', '', line.lower()).strip()
+            if len(line) <= 40 and heading in _HEADING_LOOKUP:
+                sections.append([_HEADING_LOOKUP[heading], [line]])
+            else:
+                sections[-1][1].append(line)
+        return sections
+
+    def _fit_sections(self, lines, budget):
+        """Keep whole sections in priority order, cutting the first one that doesn't fit"""
+        sections = self.split_sections(lines)
+        order = sorted(
+            range(len(sections)),
+            key=lambda i: (SECTION_PRIORITIES.get(sections[i][0], SECTION_PRIORITIES['other']), i)
+        )
+
+        kept = {}
+        remaining = budget
+        for index in order:
+            section_lines = sections[index][1]
+            cost = estimate_tokens('\n'.join(section_lines))
+            if cost <= remaining:
+                kept[index] = section_lines
+                remaining -= cost
+                continue
+
+            partial = []
+            for line in section_lines:
+                line_cost = estimate_tokens(line) + 1
+                if line_cost > remaining:
+                    break
+                partial.append(line)
+                remaining -= line_cost
+            if partial:
+                kept[index] = partial
+            break
+
+        return [line for index in sorted(kept) for line in kept[index]], True
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import re
 from datetime import datetime
 
 class Utils:
@@ -12,6 +13,40 @@ class Utils:
         if os.path.getsize(file_path) > max_size:
             raise ValueError(f"File too large. Maximum size: {max_size/1024/1024}MB")
     
+    @staticmethod
+    def parse_years(value):
+        """Pull a number of years out of strings like '5', '5+ years', '18 months' or '3 years 6 months'"""
+        if value is None:
+            return None
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = re.search(
+            r'(\d+(?:\.\d+)?)\s*(?:\+\s*)?(?:(years?|yrs?)|(months?))?(?:[\s,]*(?:and\s+)?(\d+)\s*months?)?',
+            str(value), re.IGNORECASE
+        )
+        if not match:
+            return None
+        if match.group(3):
+            # A bare month count, not years
+            return round(float(match.group(1)) / 12, 2)
+        years = float(match.group(1))
+        if match.group(4):
+            years += int(match.group(4)) / 12
+        return round(years, 2)
+
+    @staticmethod
+    def seniority_band(years):
+        """Bucket years of experience into a coarse seniority level"""
+        if years is None:
+            return "unknown"
+        if years < 2:
+            return "junior"
+        if years < 5:
+            return "mid"
+        if years < 10:
+            return "senior"
+        return "lead"
+
     @staticmethod
     def generate_report_filename(base_name):
         """Generate unique report filename"""